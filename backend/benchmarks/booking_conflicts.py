@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+Room conflict checks against a large booking history.
+
+    python benchmarks/booking_conflicts.py                       # 1M bookings, new SQLite file
+    python benchmarks/booking_conflicts.py -n 100000 --queries 5000
+    python benchmarks/booking_conflicts.py --database-url mysql+mysqlconnector://root@localhost/puki_bench
+
+Seeds n historical bookings spread over --rooms rooms (back-to-back stays of
+1-7 nights per room), then times on random rooms and windows:
+
+    find_conflict      the room-scoped check served by ix_booking_room_stay,
+                       which stops at the first overlapping booking
+    hotel-wide scan    the check as it was before: every booking overlapping
+                       the window, across all rooms, loaded into Python
+
+Use a scratch database: the script refuses to seed a booking table that
+already has rows (pass --reuse to time an existing seeded one again).
+"""
+
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+
+import common
+
+
+def seed(booking, count, rooms, rng):
+    first_day = date(2015, 1, 1)
+    per_room = count // rooms
+
+    def rows():
+        for r in range(rooms):
+            day = first_day + timedelta(days=rng.randrange(7))
+            for _ in range(per_room):
+                nights = rng.randint(1, 7)
+                yield {"guest_id": rng.randrange(1, 500000), "room_id": f"R{r:04d}", "floor": r // 100 + 1,
+                       "check_in": day, "check_out": day + timedelta(days=nights),
+                       "room_type": "Single", "price": 100.0}
+                day += timedelta(days=nights + rng.randint(0, 3))
+
+    for batch in common.batches(rows()):
+        booking.db.session.execute(booking.db.insert(booking.Booking), batch)
+    booking.db.session.commit()
+
+
+def explain(booking, query):
+    db = booking.db
+    sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if db.engine.dialect.name == "sqlite" else "EXPLAIN "
+    for row in db.session.execute(db.text(prefix + sql)):
+        print("   ", " | ".join(str(v) for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--bookings", type=int, default=1000000)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--database-url", default=None, help="default: a new SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="time an already seeded database")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("database:", common.database(args.database_url, "bookings"))
+    import booking
+    db = booking.db
+    rng = random.Random(args.seed)
+
+    with booking.app.app_context():
+        db.create_all()
+        existing = db.session.scalar(db.select(db.func.count()).select_from(booking.Booking))
+        if existing and not args.reuse:
+            print(f"booking already has {existing} rows; use a scratch database or pass --reuse")
+            return 1
+        if not existing:
+            _, seconds = common.timed(seed, booking, args.bookings, args.rooms, rng)
+            print(f"seeded {args.bookings} bookings in {seconds:.1f} s")
+
+        span = db.session.execute(db.select(db.func.min(booking.Booking.check_in), db.func.max(booking.Booking.check_out))).one()
+        windows = []
+        for _ in range(args.queries):
+            check_in = span[0] + timedelta(days=rng.randrange((span[1] - span[0]).days))
+            windows.append((f"R{rng.randrange(args.rooms):04d}", check_in, check_in + timedelta(days=rng.randint(1, 7))))
+
+        print("find_conflict plan:")
+        explain(booking, db.select(booking.Booking.booking_id).filter(
+            booking.Booking.room_id == windows[0][0],
+            booking.Booking.check_in < windows[0][2],
+            booking.Booking.check_out > windows[0][1]
+        ).limit(1))
+
+        samples = [common.timed(booking.find_conflict, *window)[1] for window in windows]
+        common.report("find_conflict", samples)
+
+        def hotel_wide(room_id, check_in, check_out):
+            return db.session.scalars(db.select(booking.Booking).filter(
+                booking.Booking.check_out > check_in, booking.Booking.check_in < check_out
+            )).all()
+
+        # Far slower; a sample is enough
+        samples = [common.timed(hotel_wide, *window)[1] for window in windows[:max(1, args.queries // 20)]]
+        common.report("hotel-wide scan (before)", samples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
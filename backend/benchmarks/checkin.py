@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""
+Check-in latency in monolith mode vs distributed mode.
+
+    python benchmarks/checkin.py                     # both modes, 200 check-ins each
+    python benchmarks/checkin.py --mode monolith -n 500
+    python benchmarks/checkin.py --mode distributed --workers 1
+
+Each mode runs in its own interpreter against a fresh SQLite database seeded
+with n guests, n vacant Single rooms and n bookings that check in today.
+
+    monolith      POST /checkin through monolith.app in-process; every call
+                  checkin makes (booking, guest, room, keycard) is dispatched
+                  to the owning app without a socket.
+    distributed   booking, guest, room, keycard and checkin each run under
+                  serve.py on localhost, and check-ins are POSTed over HTTP.
+"""
+
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import common
+
+# Distributed mode: service -> port offset from --port-base (the compose ports)
+SERVICES = {"booking": 2, "guest": 11, "room": 8, "keycard": 12, "checkin": 5}
+WARMUP = 10
+
+
+def seed(count):
+    import booking
+    import bootstrap
+    import guest
+    import room
+
+    bootstrap.main(["bootstrap.py", "guest", "room", "booking", "keycard"])
+    today = datetime.utcnow().date()
+    with guest.app.app_context():
+        guest.db.session.add_all(
+            guest.Guest(name=f"Guest {i}", email=f"guest{i}@example.com", contact=f"9{i:07d}") for i in range(count)
+        )
+        guest.db.session.commit()
+        guest_ids = guest.db.session.scalars(guest.db.select(guest.Guest.guest_id).order_by(guest.Guest.guest_id)).all()
+    with room.app.app_context():
+        room.db.session.add_all(
+            room.Room(room_id=f"B{i:04d}", room_type="Single", key_pin=0, floor=1 + i % 5, availability="VACANT")
+            for i in range(count)
+        )
+        room.db.session.commit()
+    with booking.app.app_context():
+        bookings = [
+            booking.Booking(guest_id=guest_id, check_in=today, check_out=today + timedelta(days=2),
+                            room_type="Single", price=100.0)
+            for guest_id in guest_ids
+        ]
+        booking.db.session.add_all(bookings)
+        booking.db.session.commit()
+        return [(b.booking_id, f"Guest {i}") for i, b in enumerate(bookings)]
+
+
+def run_monolith(args):
+    from werkzeug.test import Client
+
+    checkins = seed(args.count + WARMUP)
+    import monolith
+    client = Client(monolith.app)
+
+    def checkin(booking_id, name):
+        response = client.post("/checkin", json={"booking_id": booking_id, "name": name})
+        return response.status_code
+
+    return measure(checkin, checkins)
+
+
+def run_distributed(args):
+    import requests
+
+    checkins = seed(args.count + WARMUP)
+    urls = {service: f"http://127.0.0.1:{args.port_base + offset}" for service, offset in SERVICES.items()}
+    env = dict(
+        os.environ,
+        BOOKING_URL=urls["booking"], GUEST_URL=urls["guest"], ROOM_URL=urls["room"], KEYCARD_URL=urls["keycard"],
+        WEB_WORKERS=str(args.workers)
+    )
+    servers = []
+    try:
+        for service, offset in SERVICES.items():
+            port = args.port_base + offset
+            servers.append(subprocess.Popen(
+                [sys.executable, "serve.py", service, str(port)], cwd=common.BACKEND,
+                env=dict(env, METRICS_PORT=str(port + 1000)),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+        wait_healthy(requests, urls.values())
+
+        session = requests.Session()
+
+        def checkin(booking_id, name):
+            return session.post(f"{urls['checkin']}/checkin", json={"booking_id": booking_id, "name": name}).status_code
+
+        return measure(checkin, checkins)
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+
+
+def wait_healthy(requests, urls, timeout=30):
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become healthy")
+            time.sleep(0.2)
+
+
+def measure(checkin, checkins):
+    for booking_id, name in checkins[:WARMUP]:
+        checkin(booking_id, name)
+    samples = []
+    failures = 0
+    for booking_id, name in checkins[WARMUP:]:
+        code, seconds = common.timed(checkin, booking_id, name)
+        if code != 200:
+            failures += 1
+        samples.append(seconds)
+    return samples, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["monolith", "distributed", "both"], default="both")
+    parser.add_argument("-n", "--count", type=int, default=200, help="check-ins to time per mode")
+    parser.add_argument("--workers", type=int, default=2, help="serve.py workers per service (distributed)")
+    parser.add_argument("--port-base", type=int, default=15000, help="distributed ports are this plus the compose port's last digits")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        common.database(name=args.mode)
+        # Per-request logs go to /dev/null in both modes, as the servers' do
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            samples, failures = run_monolith(args) if args.mode == "monolith" else run_distributed(args)
+        common.report(f"checkin ({args.mode})", samples)
+        if failures:
+            print(f"  {failures} check-ins failed")
+        return 0
+
+    # Services bind DATABASE_URL at import, so each mode gets a fresh interpreter
+    modes = ["monolith", "distributed"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--mode", mode, "-n", str(args.count),
+             "--workers", str(args.workers), "--port-base", str(args.port_base)],
+            check=True
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Helpers shared by the benchmark scripts in this directory.
+
+The services are flat modules in backend/, imported by name as in the
+Dockerfiles, so every script puts backend/ on sys.path before importing them.
+Services read DATABASE_URL at import: call database() first.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+
+def database(url=None, name="bench"):
+    """Point the services at `url`, or at a new SQLite file, before they are imported."""
+    os.environ["METRICS_SERVER"] = "false"
+    if url is None:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="puki-bench-"), f"{name}.db")
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def batches(rows, size=10000):
+    """Yield lists of at most `size` rows from an iterable, for bulk inserts."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def timed(fn, *args, **kwargs):
+    """(result, seconds) of one call."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def report(label, samples):
+    """Print count, mean and percentiles of latencies given in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    if not ms:
+        print(f"{label:<40} no samples")
+        return
+
+    def pct(p):
+        return ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))]
+
+    print(f"{label:<40} n={len(ms):<6} mean={statistics.fmean(ms):8.3f} ms  "
+          f"p50={pct(50):8.3f}  p95={pct(95):8.3f}  p99={pct(99):8.3f}")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+"""
+Guest search and bookings-by-guest against a large guest table.
+
+    python benchmarks/guest_search.py                      # 500k guests, new SQLite file
+    python benchmarks/guest_search.py -n 50000 --queries 500
+    python benchmarks/guest_search.py --database-url mysql+mysqlconnector://root@localhost/puki_bench
+
+Seeds n guests and --bookings-per-guest bookings each, then times, through the
+services' own endpoints:
+
+    /guest/search?email=        unique key
+    /guest/search?contact=      unique key
+    /guest/search?name=         name prefix on ix_guest_name (LIMIT 50)
+    /booking/guest/<id>         ix_booking_guest
+
+and, on a sample, the lookups as the front desk had to do them before: every
+guest (or every booking) loaded and filtered in Python.
+
+The search is case-insensitive through MySQL's default collation; SQLite's
+LIKE is case-insensitive too but only uses ix_guest_name for a NOCASE column,
+so compare name-prefix numbers on MySQL.
+
+Use a scratch database: the script refuses to seed tables that already have
+rows (pass --reuse to time an existing seeded one again).
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import common
+
+FIRST = ["James", "Mary", "Wei", "Aisha", "Carlos", "Yuki", "Olivia", "Ahmed", "Priya", "Lucas",
+         "Emily", "Jack", "Sofia", "Daniel", "Mei", "Noah", "Fatima", "Liam", "Chloe", "Arjun"]
+LAST = ["Tan", "Lim", "Garcia", "Smith", "Khan", "Nguyen", "Lee", "Martinez", "Davis", "Wong",
+        "Brown", "Ong", "Patel", "Chen", "Kim", "Lopez", "Ng", "Taylor", "Goh", "Wilson"]
+
+
+def guest_name(i):
+    return f"{FIRST[i % len(FIRST)]} {LAST[(i // len(FIRST)) % len(LAST)]} {i}"
+
+
+def seed_guests(guest, count):
+    def guests():
+        for i in range(count):
+            yield {"guest_id": i + 1, "name": guest_name(i), "email": f"guest{i}@example.com", "contact": f"8{i:08d}"}
+
+    for batch in common.batches(guests()):
+        guest.db.session.execute(guest.db.insert(guest.Guest), batch)
+    guest.db.session.commit()
+
+
+def seed_bookings(booking, count, per_guest, rng):
+    def bookings():
+        for guest_id in range(1, count + 1):
+            for _ in range(per_guest):
+                check_in = date(2020, 1, 1) + timedelta(days=rng.randrange(2000))
+                yield {"guest_id": guest_id, "room_id": f"{rng.randint(1, 4)}0{rng.randint(1, 9)}", "floor": 1,
+                       "check_in": check_in, "check_out": check_in + timedelta(days=rng.randint(1, 7)),
+                       "room_type": "Single", "price": 100.0}
+
+    for batch in common.batches(bookings()):
+        booking.db.session.execute(booking.db.insert(booking.Booking), batch)
+    booking.db.session.commit()
+
+
+def time_requests(client, urls):
+    samples = []
+    # The services log one line per request; keep it out of the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for url in urls:
+            response, seconds = common.timed(client.get, url)
+            assert response.status_code in (200, 404), (url, response.status_code)
+            samples.append(seconds)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--guests", type=int, default=500000)
+    parser.add_argument("--bookings-per-guest", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--database-url", default=None, help="default: a new SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="time an already seeded database")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("database:", common.database(args.database_url, "guests"))
+    import booking
+    import guest
+    rng = random.Random(args.seed)
+
+    with booking.app.app_context():
+        booking.db.create_all()
+    with guest.app.app_context():
+        guest.db.create_all()
+        existing = guest.db.session.scalar(guest.db.select(guest.db.func.count()).select_from(guest.Guest))
+        if existing and not args.reuse:
+            print(f"Guest already has {existing} rows; use a scratch database or pass --reuse")
+            return 1
+        if not existing:
+            _, seconds = common.timed(seed_guests, guest, args.guests)
+            print(f"seeded {args.guests} guests in {seconds:.1f} s")
+        count = existing or args.guests
+    if not existing:
+        with booking.app.app_context():
+            _, seconds = common.timed(seed_bookings, booking, args.guests, args.bookings_per_guest, rng)
+        print(f"seeded {args.guests * args.bookings_per_guest} bookings in {seconds:.1f} s")
+
+    guest_client = guest.app.test_client()
+    booking_client = booking.app.test_client()
+    picks = [rng.randrange(count) for _ in range(args.queries)]
+
+    common.report("/guest/search?email=", time_requests(guest_client, [f"/guest/search?email=guest{i}@example.com" for i in picks]))
+    common.report("/guest/search?contact=", time_requests(guest_client, [f"/guest/search?contact=8{i:08d}" for i in picks]))
+    common.report("/guest/search?name= (prefix)", time_requests(
+        guest_client, [f"/guest/search?name={guest_name(i).split()[0][:3].lower()}" for i in picks]
+    ))
+    common.report("/booking/guest/<id>", time_requests(booking_client, [f"/booking/guest/{i + 1}" for i in picks]))
+
+    # Before: pull everything and filter in Python; a few samples are enough
+    sample = picks[:max(1, args.queries // 200)]
+    with guest.app.app_context():
+        def guest_by_email(email):
+            return [g for g in guest.db.session.scalars(guest.db.select(guest.Guest)) if g.email == email]
+        common.report("all guests, filtered (before)", [
+            common.timed(guest_by_email, f"guest{i}@example.com")[1] for i in sample
+        ])
+    with booking.app.app_context():
+        def bookings_for(guest_id):
+            return [b for b in booking.db.session.scalars(booking.db.select(booking.Booking)) if b.guest_id == guest_id]
+        common.report("all bookings, filtered (before)", [common.timed(bookings_for, i + 1)[1] for i in sample])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Applicable-promotion lookups against a large promotion history.
+
+    python benchmarks/promotion_lookup.py                   # 100k promotions, new SQLite file
+    python benchmarks/promotion_lookup.py -n 20000 --queries 5000
+    python benchmarks/promotion_lookup.py --database-url mysql+mysqlconnector://root@localhost/puki_bench
+
+Seeds n promotions of 3-60 days spread over the last ten years and the next
+one (most of them historical, as in a long-running property), then times:
+
+    index build              loading current and future promotions into PromotionIndex
+    applicable (future)      applicable_promotion for today onwards, from the index
+    applicable (past)        applicable_promotion before today, on ix_promotion_type_window
+    /promotion/applicable    the endpoint, future dates
+    full scan (before)       every promotion loaded and filtered in Python
+
+Use a scratch database: the script refuses to seed a promotion table that
+already has rows (pass --reuse to time an existing seeded one again).
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import common
+
+ROOM_TYPES = ["Single", "Family", "PresidentialSuite"]
+
+
+def seed(promotion, count, rng):
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=3650)
+
+    def rows():
+        for i in range(count):
+            start = first_day + timedelta(days=rng.randrange(4015))
+            yield {"promo_name": f"Promo {i}", "promo_code": f"P{i:07d}", "promo_start": start,
+                   "promo_end": start + timedelta(days=rng.randint(3, 60)),
+                   "promo_discount": float(rng.randint(5, 40)), "room_type": rng.choice(ROOM_TYPES)}
+
+    for batch in common.batches(rows()):
+        promotion.db.session.execute(promotion.db.insert(promotion.Promotion), batch)
+    promotion.db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--promotions", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--database-url", default=None, help="default: a new SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="time an already seeded database")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("database:", common.database(args.database_url, "promotions"))
+    import promotion
+    db = promotion.db
+    rng = random.Random(args.seed)
+    today = datetime.utcnow().date()
+
+    with promotion.app.app_context():
+        db.create_all()
+        existing = db.session.scalar(db.select(db.func.count()).select_from(promotion.Promotion))
+        if existing and not args.reuse:
+            print(f"promotion already has {existing} rows; use a scratch database or pass --reuse")
+            return 1
+        if not existing:
+            _, seconds = common.timed(seed, promotion, args.promotions, rng)
+            print(f"seeded {args.promotions} promotions in {seconds:.1f} s")
+
+        builds = []
+        for _ in range(5):
+            promotion._index = None
+            builds.append(common.timed(promotion.promotion_index)[1])
+        common.report("index build", builds)
+
+        future = [(rng.choice(ROOM_TYPES), today + timedelta(days=rng.randrange(365))) for _ in range(args.queries)]
+        past = [(rng.choice(ROOM_TYPES), today - timedelta(days=rng.randint(1, 3650))) for _ in range(args.queries)]
+        common.report("applicable (future, index)", [common.timed(promotion.applicable_promotion, *q)[1] for q in future])
+        common.report("applicable (past, database)", [common.timed(promotion.applicable_promotion, *q)[1] for q in past])
+
+        def full_scan(room_type, day):
+            matches = [p for p in promotion.Promotion.query.all()
+                       if p.room_type == room_type and p.promo_start <= day <= p.promo_end]
+            return max(matches, key=lambda p: p.promo_discount, default=None)
+
+        # Far slower; a sample is enough
+        common.report("full scan (before)", [common.timed(full_scan, *q)[1] for q in future[:max(1, args.queries // 500)]])
+
+    client = promotion.app.test_client()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        samples = [
+            common.timed(client.get, f"/promotion/applicable?room_type={room_type}&date={day}")[1]
+            for room_type, day in future
+        ]
+    common.report("/promotion/applicable (future)", samples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,18 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 from os import environ
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import Counter
+import click
+import invokes
+import listing
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "booking")
 
 app.json.sort_keys = False 
 
@@ -15,9 +22,22 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# Room service, used for room counts per type (inventory capacity)
+ROOM_URL = environ.get("ROOM_URL", "http://room:5008")
+ROOM_CAPACITY_CACHE_TTL = float(environ.get("ROOM_CAPACITY_CACHE_TTL", "300"))
+
+# Largest group accepted by POST /booking/bulk
+BULK_MAX_BOOKINGS = int(environ.get("BULK_MAX_BOOKINGS", "100"))
+
 # Booking Model
 class Booking(db.Model):
     __tablename__ = "booking"
+    __table_args__ = (
+        # Overlap checks are room-scoped: room_id = ? AND check_in < ? AND check_out > ?
+        db.Index("ix_booking_room_stay", "room_id", "check_in", "check_out"),
+        db.Index("ix_booking_type_stay", "room_type", "check_in", "check_out"),
+        db.Index("ix_booking_guest", "guest_id", "check_in"),
+    )
 
     booking_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     guest_id = db.Column(db.Integer, nullable=False)
@@ -41,23 +61,213 @@ class Booking(db.Model):
         }
 
 
-# Auto-create table if it doesn't exist
-with app.app_context():
-    db.create_all()
+# Inventory ledger: one row per room type per night, rooms booked.
+# Rows are created on first use; "flask --app booking rebuild-inventory" recomputes them.
+# capacity is the room count last seen by a write; checks use the current count
+# from room_capacity(), so rooms added or removed take effect straight away.
+class RoomInventory(db.Model):
+    __tablename__ = "room_inventory"
+
+    room_type = db.Column(db.String(36), primary_key=True)
+    stay_date = db.Column(db.Date, primary_key=True)
+    capacity = db.Column(db.Integer, nullable=False)
+    booked = db.Column(db.Integer, nullable=False, default=0)
+
+    def json(self, capacity=None):
+        capacity = self.capacity if capacity is None else capacity
+        return {
+            "date": str(self.stay_date),
+            "capacity": capacity,
+            "booked": self.booked,
+            "remaining": max(capacity - self.booked, 0)
+        }
+
+
+# Schema is created by bootstrap.py, not at import
+SCHEMA_VERSION = 5
+
+
+class InventoryError(Exception):
+    def __init__(self, message, code=400, room_type=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.room_type = room_type
+
+
+def stay_nights(check_in, check_out):
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+# Number of rooms of a type, from the room service (cached by invokes).
+# Call it before the transaction so no row locks are held across the HTTP call.
+def room_capacity(room_type):
+    response = invokes.invoke_http(f"{ROOM_URL}/room/type/{room_type}", method="GET", cache_ttl=ROOM_CAPACITY_CACHE_TTL)
+    if response.get("code") == 404:
+        return 0
+    if response.get("code") == 400:
+        raise InventoryError("Invalid room type.", 400)
+    if response.get("code") != 200:
+        raise InventoryError("Room service unavailable; cannot check inventory.", 503)
+    return len(response["data"]["rooms"])
+
+
+def ensure_inventory_rows(room_type, nights, capacity):
+    existing = set(db.session.scalars(
+        db.select(RoomInventory.stay_date).filter(
+            RoomInventory.room_type == room_type,
+            RoomInventory.stay_date.in_(nights)
+        )
+    ))
+    missing = [night for night in nights if night not in existing]
+    for night in missing:
+        try:
+            with db.session.begin_nested():
+                db.session.add(RoomInventory(room_type=room_type, stay_date=night, capacity=capacity, booked=0))
+        except IntegrityError:
+            pass  # another worker created the row first
+
+
+# Take `count` rooms of a type for every night of the stay, or raise InventoryError.
+# The conditional UPDATE locks each night's row, so concurrent creates can't oversell.
+def reserve_inventory(room_type, check_in, check_out, capacity, count=1):
+    nights = stay_nights(check_in, check_out)
+    ensure_inventory_rows(room_type, nights, capacity)
+    result = db.session.execute(
+        db.update(RoomInventory)
+        .where(
+            RoomInventory.room_type == room_type,
+            RoomInventory.stay_date >= check_in,
+            RoomInventory.stay_date < check_out,
+            RoomInventory.booked + count <= capacity
+        )
+        .values(booked=RoomInventory.booked + count, capacity=capacity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(nights):
+        raise InventoryError(f"No {room_type} rooms available for the selected period.")
+
+
+# Take rooms of one type for a group: night_counts maps each night to the rooms needed
+# (a negative count hands rooms back, as when a stay moves off that night).
+# Nights are locked in date order, as reserve_inventory does, so groups, moves and
+# single bookings can't deadlock; each run of consecutive nights with the same
+# count is one conditional UPDATE over a date range.
+def reserve_nights(room_type, night_counts, capacity):
+    nights = sorted(night for night, count in night_counts.items() if count)
+    ensure_inventory_rows(room_type, [night for night in nights if night_counts[night] > 0], capacity)
+    runs = []
+    for night in nights:
+        count = night_counts[night]
+        if runs and runs[-1][1] == night and runs[-1][2] == count:
+            runs[-1][1] = night + timedelta(days=1)
+        else:
+            runs.append([night, night + timedelta(days=1), count])
+    for start, end, count in runs:
+        # Releases never fail, as in release_inventory
+        fits = RoomInventory.booked + count <= capacity if count > 0 else RoomInventory.booked + count >= 0
+        result = db.session.execute(
+            db.update(RoomInventory)
+            .where(
+                RoomInventory.room_type == room_type,
+                RoomInventory.stay_date >= start,
+                RoomInventory.stay_date < end,
+                fits
+            )
+            .values(booked=RoomInventory.booked + count, capacity=capacity)
+            .execution_options(synchronize_session=False)
+        )
+        if count > 0 and result.rowcount != (end - start).days:
+            raise InventoryError(f"Not enough {room_type} rooms available for the selected period.", room_type=room_type)
+
+
+def release_inventory(room_type, check_in, check_out, count=1):
+    db.session.execute(
+        db.update(RoomInventory)
+        .where(
+            RoomInventory.room_type == room_type,
+            RoomInventory.stay_date >= check_in,
+            RoomInventory.stay_date < check_out,
+            RoomInventory.booked >= count
+        )
+        .values(booked=RoomInventory.booked - count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Recompute the ledger from bookings for every night from `start` on.
+# capacity(room_type) gives the count stored in each row; checks use the current count.
+def rebuild_ledger(start, capacity):
+    booked = Counter()
+    stays = db.session.execute(
+        db.select(Booking.room_type, Booking.check_in, Booking.check_out)
+        .filter(Booking.check_out > start)
+        .execution_options(yield_per=1000)
+    )
+    for room_type, check_in, check_out in stays:
+        for night in stay_nights(max(check_in, start), check_out):
+            booked[(room_type, night)] += 1
+
+    capacities = {room_type: capacity(room_type) for room_type, _ in booked}
+    rows = [
+        {"room_type": room_type, "stay_date": night, "capacity": capacities[room_type], "booked": count}
+        for (room_type, night), count in booked.items()
+    ]
+
+    db.session.execute(db.delete(RoomInventory).where(RoomInventory.stay_date >= start))
+    if rows:
+        db.session.execute(db.insert(RoomInventory), rows)
+    db.session.commit()
+    return len(rows)
+
+
+@app.cli.command("rebuild-inventory")
+@click.option("--from", "start", default=None, help="First night to rebuild (YYYY-MM-DD), default today.")
+def rebuild_inventory(start):
+    start = datetime.strptime(start, "%Y-%m-%d").date() if start else datetime.utcnow().date()
+    count = rebuild_ledger(start, room_capacity)
+    print(f"Rebuilt {count} inventory rows from {start}")
+
+
+# Seed data, run by bootstrap.py on a schema upgrade: fill the ledger from existing
+# bookings. Room starts after bootstrap, so the stored capacity is a placeholder
+# until the next reservation of each night writes the current count.
+def seed_data():
+    count = rebuild_ledger(datetime.utcnow().date(), lambda room_type: 0)
+    print(f"Rebuilt {count} inventory rows")
+
+# First booking of a room that overlaps [check_in, check_out), or None.
+# Served by ix_booking_room_stay and stops at the first hit.
+def find_conflict(room_id, check_in, check_out, exclude_booking_id=None):
+    query = db.select(Booking.booking_id).filter(
+        Booking.room_id == room_id,
+        Booking.check_in < check_out,
+        Booking.check_out > check_in
+    )
+    if exclude_booking_id:
+        query = query.filter(Booking.booking_id != exclude_booking_id)
+    return db.session.scalar(query.limit(1))
 
 #health check
 @app.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
-#get all bookings
+#get all bookings (?after=&limit=&fields=&format=ndjson page or stream them, see listing.py)
 @app.route("/booking", methods=["GET"])
 def get_all_bookings():
+    if listing.requested():
+        return listing.respond(db.session, Booking, [("booking_id", int)], "bookings")
     bookings = db.session.scalars(db.select(Booking)).all()
     if bookings:
         return jsonify({"code": 200, "data": {"bookings": [b.json() for b in bookings]}}), 200
     return jsonify({"code": 404, "message": "No bookings found."}), 404
 
+# Get many bookings by id with one IN query: {"ids": [...]}
+@app.route("/booking/batch", methods=["POST"])
+def get_bookings_batch():
+    return listing.respond_batch(db.session, Booking, ("booking_id", int), "bookings")
+
 #get booking by id
 @app.route("/booking/<int:booking_id>", methods=["GET"])
 def get_booking(booking_id):
@@ -66,6 +276,16 @@ def get_booking(booking_id):
         return jsonify({"code": 200, "data": booking.json()}), 200
     return jsonify({"code": 404, "message": "Booking not found."}), 404
 
+# Get a guest's bookings, oldest stay first (served by ix_booking_guest)
+@app.route("/booking/guest/<int:guest_id>", methods=["GET"])
+def get_bookings_by_guest(guest_id):
+    bookings = db.session.scalars(
+        db.select(Booking).filter_by(guest_id=guest_id).order_by(Booking.check_in, Booking.booking_id)
+    ).all()
+    if bookings:
+        return jsonify({"code": 200, "data": {"bookings": [b.json() for b in bookings]}}), 200
+    return jsonify({"code": 404, "message": "No bookings found for this guest."}), 404
+
 #update booking
 @app.route("/booking/<int:booking_id>", methods=["PUT"])
 def update_booking(booking_id):
@@ -81,32 +301,38 @@ def update_booking(booking_id):
     if new_check_out <= new_check_in:
         return jsonify({"code": 400, "message": "Check-out must be after check-in."}), 400
 
-    # Only check for conflicts in the same room
-    conflict_query = db.select(Booking).filter(
-        Booking.booking_id != booking_id,
-        Booking.check_out > new_check_in,
-        Booking.check_in < new_check_out
-    )
-
-    conflicts = db.session.scalars(conflict_query).all()
+    move = (new_check_in, new_check_out) != (booking.check_in, booking.check_out)
+    if move:
+        # Room count before any row is locked; the read above takes no locks
+        try:
+            capacity = room_capacity(booking.room_type)
+        except InventoryError as e:
+            return jsonify({"code": e.code, "message": e.message}), e.code
+
+    # Only check for conflicts in the same room (unassigned bookings have none)
+    if booking.room_id:
+        conflict_id = find_conflict(booking.room_id, new_check_in, new_check_out, exclude_booking_id=booking_id)
+        if conflict_id:
+            print(f"Booking {booking_id} conflicts with booking {conflict_id} in room {booking.room_id}")
+            return jsonify({"code": 400, "message": "Room is already booked for selected dates."}), 400
 
-    # Debug logging
-    print(f"Checking conflicts for Booking ID {booking_id}")
-    print(f"New Check-in: {new_check_in}, Check-out: {new_check_out}")
-    print(f"Conflicts found: {len(conflicts)}")
-    for c in conflicts:
-        print(f" - Conflict Booking ID {c.booking_id}, Room {c.room_id}, {c.check_in} → {c.check_out}")
-
-    if conflicts:
-        return jsonify({"code": 400, "message": "Room is already booked for selected dates."}), 400
+    try:
+        # Move the stay in the inventory ledger: the net change per night, in date
+        # order, so only nights gained or lost are touched
+        if move:
+            changes = Counter(stay_nights(new_check_in, new_check_out))
+            changes.subtract(stay_nights(booking.check_in, booking.check_out))
+            reserve_nights(booking.room_type, changes, capacity)
 
-    # Apply changes
-    booking.check_in = new_check_in
-    booking.check_out = new_check_out
+        # Apply changes
+        booking.check_in = new_check_in
+        booking.check_out = new_check_out
 
-    try:
         db.session.commit()
         return jsonify({"code": 200, "data": booking.json()}), 200
+    except InventoryError as e:
+        db.session.rollback()
+        return jsonify({"code": e.code, "message": e.message}), e.code
     except Exception as e:
         db.session.rollback()
         print("Error updating booking:", str(e))
@@ -120,6 +346,7 @@ def cancel_booking(booking_id):
         return jsonify({"code": 404, "message": "Booking not found."}), 404
 
     try:
+        release_inventory(booking.room_type, booking.check_in, booking.check_out)
         db.session.delete(booking)
         db.session.commit()
         return jsonify({"code": 200, "message": "Booking cancelled and deleted."}), 200
@@ -132,12 +359,11 @@ def cancel_booking(booking_id):
 @app.route("/booking/active", methods=["GET"])
 def get_active_booking():
     today = datetime.utcnow().date()
-    active_bookings = db.session.scalars(
-        db.select(Booking).filter(
-            Booking.check_in <= today,
-            Booking.check_out >= today
-        )
-    ).all()
+    active = (Booking.check_in <= today, Booking.check_out >= today)
+    if listing.requested():
+        return listing.respond(db.session, Booking, [("booking_id", int)], "active_bookings", where=active)
+
+    active_bookings = db.session.scalars(db.select(Booking).filter(*active)).all()
 
     if active_bookings:
         return jsonify({
@@ -148,6 +374,44 @@ def get_active_booking():
         }), 200
     return jsonify({"code": 404, "message": "No active booking found."}), 404
 
+# A stay occupies its room from check-in until the morning of check-out
+def occupying(today):
+    return (Booking.check_in <= today, Booking.check_out > today)
+
+# Get the booking occupying a room today (ix_booking_room_stay: room_id = ? AND check_in <= ?)
+@app.route("/booking/active/<string:room_id>", methods=["GET"])
+def get_active_booking_for_room(room_id):
+    booking = db.session.scalar(
+        db.select(Booking).filter(Booking.room_id == room_id, *occupying(datetime.utcnow().date())).limit(1)
+    )
+    if booking:
+        return jsonify({"code": 200, "data": booking.json()}), 200
+    return jsonify({"code": 404, "message": "No active booking for this room."}), 404
+
+# Same for many rooms with one IN query: {"ids": [...]}; rooms with none are listed in "missing"
+@app.route("/booking/active/batch", methods=["POST"])
+def get_active_bookings_for_rooms():
+    room_ids = (request.get_json(silent=True) or {}).get("ids")
+    if not isinstance(room_ids, list) or not all(isinstance(room_id, str) for room_id in room_ids):
+        return jsonify({"code": 400, "message": "ids must be a list of room ids."}), 400
+    if len(room_ids) > listing.BATCH_MAX_IDS:
+        return jsonify({"code": 400, "message": f"At most {listing.BATCH_MAX_IDS} ids per batch."}), 400
+
+    found = {}
+    if room_ids:
+        for booking in db.session.scalars(
+            db.select(Booking).filter(Booking.room_id.in_(room_ids), *occupying(datetime.utcnow().date()))
+        ):
+            found.setdefault(booking.room_id, booking)
+    room_ids = list(dict.fromkeys(room_ids))
+    return jsonify({
+        "code": 200,
+        "data": {
+            "active_bookings": [found[room_id].json() for room_id in room_ids if room_id in found],
+            "missing": [room_id for room_id in room_ids if room_id not in found]
+        }
+    }), 200
+
 # Check if a room is available for a given date range
 @app.route("/booking/availability", methods=["POST"])
 def check_availability():
@@ -159,22 +423,65 @@ def check_availability():
     # Optionally exclude a specific booking (for updates)
     exclude_booking_id = data.get("exclude_booking_id")
     
-    query = db.select(Booking).filter(
-        Booking.room_id == room_id,
-        Booking.check_out > check_in,
-        Booking.check_in < check_out
-    )
-    
-    if exclude_booking_id:
-        query = query.filter(Booking.booking_id != exclude_booking_id)
-        
-    conflicting_booking = db.session.scalar(query)
+    conflicting_booking = find_conflict(room_id, check_in, check_out, exclude_booking_id)
     
     if conflicting_booking:
         return jsonify({"code": 400, "available": False, "message": "Room is not available for the selected period."}), 400
     
     return jsonify({"code": 200, "available": True, "message": "Room is available for the selected period."}), 200
 
+# Check if any room of a type is free for every night of a stay (one ledger row per night)
+@app.route("/booking/availability/type", methods=["GET"])
+def check_type_availability():
+    room_type = request.args.get("room_type")
+    try:
+        check_in = datetime.strptime(request.args.get("check_in", ""), "%Y-%m-%d").date()
+        check_out = datetime.strptime(request.args.get("check_out", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"code": 400, "message": "check_in and check_out must be YYYY-MM-DD."}), 400
+
+    if not room_type:
+        return jsonify({"code": 400, "message": "room_type is required."}), 400
+    if check_out <= check_in:
+        return jsonify({"code": 400, "message": "Check-out must be after check-in."}), 400
+
+    try:
+        capacity = room_capacity(room_type)
+    except InventoryError as e:
+        return jsonify({"code": e.code, "message": e.message}), e.code
+
+    rows = {
+        row.stay_date: row for row in db.session.scalars(
+            db.select(RoomInventory).filter(
+                RoomInventory.room_type == room_type,
+                RoomInventory.stay_date >= check_in,
+                RoomInventory.stay_date < check_out
+            )
+        )
+    }
+
+    nights = []
+    for night in stay_nights(check_in, check_out):
+        if night in rows:
+            nights.append(rows[night].json(capacity))
+            continue
+        # No ledger row yet: nothing booked that night
+        nights.append({"date": str(night), "capacity": capacity, "booked": 0, "remaining": capacity})
+
+    remaining = min(n["remaining"] for n in nights)
+    available = remaining > 0
+    return jsonify({
+        "code": 200 if available else 400,
+        "available": available,
+        "data": {
+            "room_type": room_type,
+            "check_in": str(check_in),
+            "check_out": str(check_out),
+            "rooms_available": remaining,
+            "nights": nights
+        }
+    }), 200 if available else 400
+
 # Create a booking
 @app.route("/booking", methods=["POST"])
 def create_booking():
@@ -193,16 +500,14 @@ def create_booking():
     if check_out <= check_in:
         return jsonify({"code": 400, "message": "Check-out must be after check-in."}), 400
     
+    # Room count first, so the HTTP call happens outside the transaction
+    try:
+        capacity = room_capacity(room_type)
+    except InventoryError as e:
+        return jsonify({"code": e.code, "message": e.message}), e.code
+    
     # Check if the room is available for the given dates
-    conflict = None
-    if room_id:
-        conflict = db.session.scalar(
-            db.select(Booking).filter(
-                Booking.room_id == room_id,
-                Booking.check_out > check_in,
-                Booking.check_in < check_out
-            )
-        )
+    conflict = find_conflict(room_id, check_in, check_out) if room_id else None
     
     if conflict:
         return jsonify({"code": 400, "message": "Room is already booked for the selected period."}), 400
@@ -218,14 +523,114 @@ def create_booking():
     )
     
     try:
+        reserve_inventory(room_type, check_in, check_out, capacity)
         db.session.add(new_booking)
         db.session.commit()
         return jsonify({"code": 201, "data": new_booking.json()}), 201
+    except InventoryError as e:
+        db.session.rollback()
+        return jsonify({"code": e.code, "message": e.message}), e.code
     except Exception as e:
         db.session.rollback()
         print(str(e))
         return jsonify({"code": 500, "message": "Error creating booking."}), 500
 
+# Parse one item of a bulk request into Booking fields, or raise ValueError
+def parse_bulk_item(item):
+    if not isinstance(item, dict):
+        raise ValueError("Each booking must be an object.")
+    if not all(item.get(field) for field in ("guest_id", "check_in", "check_out", "room_type", "price")):
+        raise ValueError("Missing required fields.")
+    try:
+        check_in = datetime.strptime(item["check_in"], "%Y-%m-%d").date()
+        check_out = datetime.strptime(item["check_out"], "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+    if check_out <= check_in:
+        raise ValueError("Check-out must be after check-in.")
+    return {
+        "guest_id": item["guest_id"],
+        "room_id": item.get("room_id"),
+        "floor": item.get("floor"),
+        "check_in": check_in,
+        "check_out": check_out,
+        "room_type": item["room_type"],
+        "price": item["price"]
+    }
+
+# Create a group of bookings in one transaction: all are created or none.
+# Body: {"bookings": [{guest_id, room_type, check_in, check_out, price[, room_id, floor]}, ...]}
+@app.route("/booking/bulk", methods=["POST"])
+def create_bookings_bulk():
+    items = (request.get_json(silent=True) or {}).get("bookings")
+    if not isinstance(items, list) or not items:
+        return jsonify({"code": 400, "message": "bookings must be a non-empty list."}), 400
+    if len(items) > BULK_MAX_BOOKINGS:
+        return jsonify({"code": 400, "message": f"At most {BULK_MAX_BOOKINGS} bookings per group."}), 400
+
+    # Validate everything before touching the database
+    parsed = []
+    results = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append(parse_bulk_item(item))
+            results.append({"index": index, "code": 200})
+        except ValueError as e:
+            parsed.append(None)
+            results.append({"index": index, "code": 400, "message": str(e)})
+
+    # Room counts first, so the HTTP calls happen outside the transaction
+    capacities = {}
+    for room_type in sorted({fields["room_type"] for fields in parsed if fields is not None}):
+        try:
+            capacities[room_type] = room_capacity(room_type)
+        except InventoryError as e:
+            return jsonify({"code": e.code, "message": e.message}), e.code
+
+    # Rooms named in the request must be free, and not claimed twice by the group
+    for index, fields in enumerate(parsed):
+        if fields is None or not fields["room_id"]:
+            continue
+        clash = any(
+            other is not None and other["room_id"] == fields["room_id"]
+            and other["check_in"] < fields["check_out"] and other["check_out"] > fields["check_in"]
+            for other in parsed[:index]
+        )
+        if clash or find_conflict(fields["room_id"], fields["check_in"], fields["check_out"]):
+            results[index] = {"index": index, "code": 400, "message": "Room is already booked for the selected period."}
+
+    if any(result["code"] != 200 for result in results):
+        return jsonify({"code": 400, "message": "Group rejected; no bookings were created.", "data": {"results": results}}), 400
+
+    # Rooms needed per type per night, reserved one type at a time in name order
+    needed = {}
+    for fields in parsed:
+        nights = needed.setdefault(fields["room_type"], Counter())
+        nights.update(stay_nights(fields["check_in"], fields["check_out"]))
+
+    try:
+        for room_type, night_counts in sorted(needed.items()):
+            reserve_nights(room_type, night_counts, capacities[room_type])
+
+        # MySQL has no INSERT ... RETURNING, so the ORM inserts row by row to
+        # learn each booking_id; all inserts still share this one transaction
+        bookings = [Booking(**fields) for fields in parsed]
+        db.session.add_all(bookings)
+        db.session.commit()
+    except InventoryError as e:
+        db.session.rollback()
+        for index, fields in enumerate(parsed):
+            if e.room_type in (None, fields["room_type"]):
+                results[index] = {"index": index, "code": e.code, "message": e.message}
+        return jsonify({"code": e.code, "message": "Group rejected; no bookings were created.", "data": {"results": results}}), e.code
+    except Exception as e:
+        db.session.rollback()
+        print("Error creating bookings:", str(e))
+        return jsonify({"code": 500, "message": "Error creating bookings."}), 500
+
+    results = [{"index": index, "code": 201, "data": booking.json()} for index, booking in enumerate(bookings)]
+    return jsonify({"code": 201, "data": {"results": results}}), 201
+
 #assign room to booking
 @app.route("/booking/<int:booking_id>/assign-room", methods=["PUT"])
 def assign_room(booking_id):
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+One-shot schema bootstrap for the Puki services.
+
+    python bootstrap.py                  # every database-backed service
+    python bootstrap.py booking price    # only these services
+    python bootstrap.py --coldstart      # time a cold import of each service
+
+Services no longer touch the database at import. This command does it once per
+deployment instead: for each service it creates missing tables, columns and
+indexes from the models, runs the service's seed_data() if it defines one, and
+records the service's SCHEMA_VERSION in the schema_version table. Services
+whose recorded version is already current are skipped.
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+SERVICES = ["guest", "room", "booking", "keycard", "housekeeper", "roster", "price", "promotion"]
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("service", String(32), primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def recorded_version(conn, service):
+    return conn.execute(
+        select(schema_version.c.version).where(schema_version.c.service == service)
+    ).scalar() or 0
+
+
+def record_version(conn, service, version):
+    values = {"version": version, "applied_at": datetime.utcnow()}
+    updated = conn.execute(
+        schema_version.update().where(schema_version.c.service == service).values(**values)
+    )
+    if updated.rowcount == 0:
+        conn.execute(schema_version.insert().values(service=service, **values))
+
+
+def sync_schema(db):
+    """Create missing tables, then add columns and indexes that existing tables lack."""
+    db.create_all()
+    engine = db.engine
+    quote = engine.dialect.identifier_preparer.quote
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    print(f"  adding column {table.name}.{column.name}")
+                    conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    print(f"  adding index {index.name}")
+                    index.create(conn)
+
+
+def bootstrap(service):
+    module = importlib.import_module(service)
+    version = getattr(module, "SCHEMA_VERSION", 1)
+    with module.app.app_context():
+        engine = module.db.engine
+        schema_version.create(engine, checkfirst=True)
+        with engine.connect() as conn:
+            current = recorded_version(conn, service)
+        if current >= version:
+            print(f"{service}: schema v{current} is current")
+            return
+
+        print(f"{service}: upgrading schema v{current} -> v{version}")
+        sync_schema(module.db)
+        seed = getattr(module, "seed_data", None)
+        if seed is not None:
+            seed()
+        with engine.begin() as conn:
+            record_version(conn, service, version)
+        print(f"{service}: schema v{version} applied")
+
+
+def coldstart(services):
+    """Import each service in a fresh interpreter and report how long it took."""
+    probe = "import time; t = time.perf_counter(); import {0}; print(round((time.perf_counter() - t) * 1000, 1))"
+    env = dict(os.environ, METRICS_SERVER="false")
+    for service in services:
+        result = subprocess.run(
+            [sys.executable, "-c", probe.format(service)],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if result.returncode != 0:
+            print(f"{service}: import failed\n{result.stderr}")
+        else:
+            print(f"{service}: cold import {result.stdout.strip().splitlines()[-1]} ms")
+
+
+def main(argv):
+    args = argv[1:]
+    if args and args[0] == "--coldstart":
+        coldstart(args[1:] or SERVICES)
+        return 0
+
+    # Importing a service must not grab the metrics port
+    os.environ["METRICS_SERVER"] = "false"
+    failed = False
+    for service in args or SERVICES:
+        try:
+            bootstrap(service)
+        except Exception as e:
+            failed = True
+            print(f"{service}: bootstrap failed: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
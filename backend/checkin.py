@@ -1,12 +1,14 @@
 # complex microservice 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from datetime import datetime
 import invokes
 from os import environ
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "checkin", span_header=True)
 
 # Get URLs from environment variables
 BOOKING_URL = environ.get('BOOKING_URL', 'http://localhost:5002')
@@ -21,6 +23,10 @@ KEYCARD_PORT = environ.get('KEYCARD_PORT', '5012')
 def health():
     return {"status": "healthy"}
 
+# Hand a claimed room back when check-in fails after the claim
+def release_room(room_id):
+    invokes.invoke_http(f"{ROOM_URL}/room/{room_id}/update-status", json={"status": "VACANT"}, method="PUT")
+
 @app.route("/checkin", methods=["POST"])
 def self_checkin():
     data = request.get_json()
@@ -50,25 +56,34 @@ def self_checkin():
             "message": f"Check-in only allowed on the check-in date ({check_in_dt}). Today is {today}."
         }), 400
 
-    # 3. Get guest info and validate name
-    guest_response = invokes.invoke_http(f"{GUEST_URL}/guest/{guest_id}", method="GET")
+    # 3. Get guest info and claim a vacant room of the booked type, concurrently
+    claim_payload = {"room_type": room_type, "floor": data.get("floor")}
+    guest_response, room_response = invokes.invoke_many([
+        {"url": f"{GUEST_URL}/guest/{guest_id}", "method": "GET"},
+        {"url": f"{ROOM_URL}/room/claim", "method": "POST", "json": claim_payload}
+    ])
+    claimed = room_response.get("code") == 200
+
+    guest_error = None
     if guest_response.get("code") != 200:
-        return jsonify({"code": 400, "message": "Guest not found."}), 400
+        guest_error = "Guest not found."
+    elif guest_response["data"].get("name", "").strip().lower() != name.strip().lower():
+        guest_error = "Guest name does not match booking record."
 
-    guest = guest_response["data"]
-    if guest.get("name", "").strip().lower() != name.strip().lower():
-        return jsonify({"code": 400, "message": "Guest name does not match booking record."}), 400
+    if guest_error:
+        if claimed:
+            release_room(room_response["data"]["room_id"])
+        return jsonify({"code": 400, "message": guest_error}), 400
 
-    # 4. Fetch available room by type
-    room_response = invokes.invoke_http(f"{ROOM_URL}/room/next-available/{room_type}", method="GET")
-    if room_response.get("code") != 200:
+    # 4. Validate claimed room
+    if not claimed:
         return jsonify({"code": 400, "message": "No vacant room of this type available today."}), 400
 
     room = room_response["data"]
     room_id = room["room_id"]
     floor = room["floor"]
 
-    # 5. Update booking to assign room
+    # 5. Update booking to assign room (the claim already marked it OCCUPIED)
     update_booking_url = f"{BOOKING_URL}/booking/{booking_id}/assign-room"
     update_payload = {
         "room_id": room_id,
@@ -76,15 +91,10 @@ def self_checkin():
     }
     booking_update_response = invokes.invoke_http(update_booking_url, json=update_payload, method="PUT")
     if booking_update_response.get("code") != 200:
+        release_room(room_id)
         return jsonify({"code": 500, "message": "Failed to update booking with room assignment."}), 500
 
-    # 6. Mark room as OCCUPIED
-    update_room_url = f"{ROOM_URL}/room/{room_id}/update-status"
-    room_status_response = invokes.invoke_http(update_room_url, json={"status": "OCCUPIED"}, method="PUT")
-    if room_status_response.get("code") != 200:
-        return jsonify({"code": 500, "message": "Failed to update room status."}), 500
-
-    # 7. Generate keycard
+    # 6. Generate keycard
     keycard_payload = {
         "booking_id": booking_id,
         "guest_id": guest_id,
@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from datetime import datetime
 from os import environ
 import json
@@ -8,6 +9,7 @@ import invokes
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "checkout", span_header=True)
 
 # Get URLs from environment variables
 BOOKING_URL = environ.get('BOOKING_URL', 'http://booking:5002')
@@ -1,6 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from datetime import datetime
+import instrumentation
+from datetime import datetime, timedelta
+import bisect
 from os import environ
 import json
 import pika
@@ -8,16 +10,30 @@ import invokes
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "dynamicprice", span_header=True)
 
 # Get URLs from environment variables - use Docker service names instead of localhost
 PRICE_URL = environ.get('PRICE_URL', 'http://price:5003')
 PROMOTION_URL = environ.get('PROMOTION_URL', 'http://promotion:5004')
 
+# Client-side cache TTLs (seconds); stale entries are revalidated with ETags
+PRICE_CACHE_TTL = float(environ.get('PRICE_CACHE_TTL', '60'))
+PROMOTION_CACHE_TTL = float(environ.get('PROMOTION_CACHE_TTL', '30'))
+
+# Longest range /dynamicprice/calendar will price
+MAX_CALENDAR_NIGHTS = int(environ.get('MAX_CALENDAR_NIGHTS', '366'))
+
 # health check
 @app.route("/health")
 def health():
     return {"status": "healthy"}
 
+# Price of one night: the base price less the winning promotion's discount (a
+# promotion's json(), or None). Both /dynamicprice and the calendars use this.
+def night_price(base_price, promo):
+    discount = promo["promo_discount"] if promo else 0
+    return discount, round(base_price * (1 - discount / 100), 2)
+
 # Get dynamic price
 @app.route("/dynamicprice", methods=["GET"])
 def get_dynamic_price():
@@ -28,42 +44,27 @@ def get_dynamic_price():
         return jsonify({"code": 400, "message": "Missing room_type or date parameter"}), 400
 
     try:
-        # Step 1: Get base price from price service
-        price_url = f"{PRICE_URL}/price/{room_type}"
+        # Step 1: Get the base price in force on the date from price service
+        price_url = f"{PRICE_URL}/price/type/{room_type}/rate?date={date}"
         print(f"Fetching price from: {price_url}")
-        price_response = invokes.invoke_http(price_url, method="GET")
+        price_response = invokes.invoke_http(price_url, method="GET", cache_ttl=PRICE_CACHE_TTL)
         print(f"Price service response: {price_response}")
-        
-        if not isinstance(price_response, list) and price_response.get("code") != 200:
-            return jsonify({"code": 404, "message": f"No base price found for room_type '{room_type}'"}), 404
 
-        # Handle both list format and dict with data field format
-        if isinstance(price_response, list):
-            prices = price_response
-        else:
-            prices = price_response.get("data", [])
-            
-        if not prices:
-            return jsonify({"code": 404, "message": f"No prices found for room_type '{room_type}'"}), 404
+        if price_response.get("code") != 200:
+            return jsonify({"code": 404, "message": f"No base price found for room_type '{room_type}'"}), 404
 
-        base_price = prices[0]["price"]  # Use first price returned
+        base_price = price_response["data"]["price"]
 
         # Step 2: Get applicable promotions from promotion service
         promo_url = f"{PROMOTION_URL}/promotion/applicable?room_type={room_type}&date={date}"
         print(f"Fetching promotions from: {promo_url}")
-        promo_response = invokes.invoke_http(promo_url, method="GET")
+        promo_response = invokes.invoke_http(promo_url, method="GET", cache_ttl=PROMOTION_CACHE_TTL)
         print(f"Promotion service response: {promo_response}")
         
-        discount = 0
-        promo_data = None
-
-        if promo_response.get("code") == 200:
-            promo_payload = promo_response.get("data", {})
-            discount = promo_payload.get("discount", 0)
-            promo_data = promo_payload
+        promo_data = promo_response.get("data") if promo_response.get("code") == 200 else None
 
         # Step 3: Compute final price
-        final_price = round(base_price * (1 - discount / 100), 2)
+        discount, final_price = night_price(base_price, promo_data)
 
         return jsonify({
             "code": 200,
@@ -82,5 +83,110 @@ def get_dynamic_price():
         traceback.print_exc()
         return jsonify({"code": 500, "message": f"Unexpected error: {str(e)}"}), 500
 
+# Per-night prices for one room type over [start, end), from the rate periods in
+# force over the range and the winning promotion for each night (from
+# /promotion/quote, in night order)
+def build_calendar(room_type, start, end, periods, promotions):
+    period_starts = [datetime.strptime(p["applies_from"], "%Y-%m-%d").date() for p in periods]
+    calendar = []
+    for i, promo in enumerate(promotions):
+        night = start + timedelta(days=i)
+        base_price = periods[bisect.bisect_right(period_starts, night) - 1]["price"]
+        discount, final_price = night_price(base_price, promo)
+        calendar.append({
+            "date": str(night),
+            "base_price": base_price,
+            "discount_applied": discount,
+            "final_price": final_price,
+            "promo_id": promo["promo_id"] if promo else None
+        })
+
+    return {
+        "room_type": room_type,
+        "start": str(start),
+        "end": str(end),
+        "base_price": periods[0]["price"],
+        "nights": calendar,
+        "total_price": round(sum(night["final_price"] for night in calendar), 2)
+    }
+
+# Price calendars for several room types: one rate-periods call per type and a
+# single promotion quote covering every type and night, all concurrent
+def price_calendars(room_types, start, end):
+    last_night = end - timedelta(days=1)
+    calls = [
+        {"url": f"{PRICE_URL}/price/type/{room_type}/rates?start={start}&end={end}", "method": "GET", "cache_ttl": PRICE_CACHE_TTL}
+        for room_type in room_types
+    ]
+    calls.append({
+        "url": f"{PROMOTION_URL}/promotion/quote",
+        "method": "POST",
+        "json": {"ranges": [
+            {"room_type": room_type, "start": str(start), "end": str(last_night)} for room_type in room_types
+        ]}
+    })
+    *price_responses, quote_response = invokes.invoke_many(calls)
+
+    if quote_response.get("code") != 200:
+        raise RuntimeError("Failed to get promotion quotes")
+    quotes = quote_response["data"]["quotes"]
+    nights = (end - start).days
+
+    calendars = []
+    for index, (room_type, price_response) in enumerate(zip(room_types, price_responses)):
+        if price_response.get("code") != 200:
+            raise LookupError(f"No base price found for room_type '{room_type}'")
+        # Quotes come back in request order: each range's nights, one range per type
+        promotions = [quote["promotion"] for quote in quotes[index * nights:(index + 1) * nights]]
+        calendars.append(build_calendar(room_type, start, end, price_response["data"]["periods"], promotions))
+    return calendars
+
+def calendar_range():
+    try:
+        start = datetime.strptime(request.args.get("start", ""), "%Y-%m-%d").date()
+        end = datetime.strptime(request.args.get("end", ""), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD.")
+    if end <= start:
+        raise ValueError("end must be after start.")
+    if (end - start).days > MAX_CALENDAR_NIGHTS:
+        raise ValueError(f"At most {MAX_CALENDAR_NIGHTS} nights per calendar.")
+    return start, end
+
+def calendar_response(room_types):
+    try:
+        start, end = calendar_range()
+        return price_calendars(room_types, start, end), None
+    except ValueError as e:
+        return None, (jsonify({"code": 400, "message": str(e)}), 400)
+    except LookupError as e:
+        return None, (jsonify({"code": 404, "message": str(e)}), 404)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return None, (jsonify({"code": 500, "message": f"Unexpected error: {str(e)}"}), 500)
+
+# Price every night of [start, end) for one room type (end is the check-out date)
+@app.route("/dynamicprice/calendar", methods=["GET"])
+def get_price_calendar():
+    room_type = request.args.get("room_type")
+    if not room_type:
+        return jsonify({"code": 400, "message": "Missing room_type parameter"}), 400
+    calendars, error = calendar_response([room_type])
+    if error:
+        return error
+    return jsonify({"code": 200, "data": calendars[0]}), 200
+
+# Same for several room types: ?room_types=Single,Family&start=&end=
+@app.route("/dynamicprice/calendar/types", methods=["GET"])
+def get_price_calendars():
+    room_types = [t.strip() for t in request.args.get("room_types", "").split(",") if t.strip()]
+    if not room_types:
+        return jsonify({"code": 400, "message": "Missing room_types parameter"}), 400
+    calendars, error = calendar_response(list(dict.fromkeys(room_types)))
+    if error:
+        return error
+    return jsonify({"code": 200, "data": {"calendars": calendars}}), 200
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5016, debug=True)
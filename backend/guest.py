@@ -1,11 +1,14 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
+import listing
 from flask_sqlalchemy import SQLAlchemy
 from os import environ
 import traceback
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "guest")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
@@ -17,6 +20,8 @@ db = SQLAlchemy(app)
 # Guest Model
 class Guest (db.Model):
     __tablename__ = "Guest"
+    # Name prefix search: name LIKE 'abc%' under the table's case-insensitive collation
+    __table_args__ = (db.Index("ix_guest_name", "name"),)
 
     guest_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(64), nullable=False)
@@ -31,24 +36,58 @@ class Guest (db.Model):
             "contact": self.contact
         }
 
-# Auto-create table if it doesn't exist
-with app.app_context():
-    db.create_all()
+# Schema is created by bootstrap.py, not at import
+SCHEMA_VERSION = 2
 
 #health check
 @app.route("/health")
 def health():
     return {"status": "healthy"}
 
-#get all guests
+#get all guests (?after=&limit=&fields=&format=ndjson page or stream them, see listing.py)
 @app.route("/guest", methods=["GET"])
 def get_all():
+    if listing.requested():
+        return listing.respond(db.session, Guest, [("guest_id", int)], "guests")
     guest = db.session.execute(db.select(Guest)).scalars().all()
     if len(guest) > 0: 
         return jsonify({"code": 200, "data": {"guests": [g.json() for g in guest]}}), 200
     else:
         return jsonify({"code": 404, "message": "No guests found."}), 404
 
+# get many guests by ID with one IN query: {"ids": [...]}
+@app.route("/guest/batch", methods=["POST"])
+def get_guests_batch():
+    return listing.respond_batch(db.session, Guest, ("guest_id", int), "guests")
+
+# Rows returned by /guest/search at most
+SEARCH_LIMIT = int(environ.get("GUEST_SEARCH_LIMIT", "50"))
+
+# search guests by exact email or contact, or by name prefix (case-insensitive)
+@app.route("/guest/search", methods=["GET"])
+def search_guests():
+    email = request.args.get("email", "").strip()
+    contact = request.args.get("contact", "").strip()
+    name = request.args.get("name", "").strip()
+    if not (email or contact or name):
+        return jsonify({"code": 400, "message": "Provide email, contact or name."}), 400
+
+    # Each criterion has its own index (email and contact are unique keys)
+    query = db.select(Guest)
+    if email:
+        query = query.filter(Guest.email == email)
+    if contact:
+        query = query.filter(Guest.contact == contact)
+    if name:
+        # No lower() around the column, so ix_guest_name can serve the prefix range;
+        # the column's case-insensitive collation makes the match case-insensitive
+        query = query.filter(Guest.name.startswith(name, autoescape=True))
+
+    guests = db.session.scalars(query.order_by(Guest.name, Guest.guest_id).limit(SEARCH_LIMIT)).all()
+    if guests:
+        return jsonify({"code": 200, "data": {"guests": [g.json() for g in guests]}}), 200
+    return jsonify({"code": 404, "message": "No guests found."}), 404
+
 # get specific guest by ID
 @app.route("/guest/<int:guest_id>", methods=["GET"])
 def get_guest(guest_id):
@@ -1,11 +1,13 @@
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+import instrumentation
 from os import environ
 import random
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "housekeeper", etag=True)
 
 # Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL", "sqlite:///housekeepers.db")
@@ -28,9 +30,8 @@ class Housekeeper(db.Model):
             "floor": self.floor
         }
 
-# Create the table
-with app.app_context():
-    db.create_all()
+# Table is created by bootstrap.py
+SCHEMA_VERSION = 1
 
 # Health check
 @app.route("/health")
@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from datetime import datetime
 import threading
 import invokes 
@@ -8,12 +9,17 @@ from os import environ
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "housekeeping")
 
 # Get URLs from environment variables
 ROOM_URL = environ.get('ROOM_URL', 'http://localhost:5008')
+BOOKING_URL = environ.get('BOOKING_URL', 'http://localhost:5002')
 ROSTER_URL = environ.get('ROSTER_URL', 'http://localhost:5009')
 HOUSEKEEPER_URL = environ.get('HOUSEKEEPER_URL', 'http://localhost:5014')
 
+# Housekeeper-by-floor rarely changes, so cache it client-side (seconds)
+HOUSEKEEPER_CACHE_TTL = float(environ.get('HOUSEKEEPER_CACHE_TTL', '300'))
+
 # health check
 @app.route("/health")
 def health():
@@ -52,7 +58,8 @@ def housekeeping():
         if not assigned_housekeeper:
             housekeeper_response = invokes.invoke_http(
                 f"{HOUSEKEEPER_URL}/housekeeper/floor/{floor}",
-                method="GET"
+                method="GET",
+                cache_ttl=HOUSEKEEPER_CACHE_TTL
             )
 
             if housekeeper_response.get("code") == 200:
@@ -149,7 +156,8 @@ def simulate_cleaning_cycle(room_id):
     time.sleep(5)
 
     try:
-        booking_response = invokes.invoke_http(f"{ROOM_URL}/booking/active/{room_id}", method="GET")
+        # One indexed lookup: is anyone staying in this room tonight?
+        booking_response = invokes.invoke_http(f"{BOOKING_URL}/booking/active/{room_id}", method="GET")
         final_status = "OCCUPIED" if booking_response.get("code") == 200 else "VACANT"
         print(f"[INFO] Final status for room {room_id}: {final_status}")
         room_status_response = invokes.invoke_http(
@@ -0,0 +1,287 @@
+"""
+Prometheus instrumentation and tracing shared by every Puki service.
+
+Call instrument(app, "<service>") right after creating the Flask app. It records
+request count, in-flight requests and latency by route and status, plus the
+latency of every outbound invokes.invoke_http call by target service, and the
+invokes pool, breaker, coalescing and cache counters. Metrics are served on
+METRICS_PORT (8000, the port prometheus.yml scrapes) and on the app's own
+/metrics route; under serve.py with several workers both report the sum over
+workers.
+
+Every request also joins (or starts) a trace: the X-Trace-Id header is echoed
+back and one structured log line is printed per request. Composite services
+(span_header=True) return their span tree in X-Trace-Spans, but only to
+callers that send X-Trace-Debug: 1, or on every reply when TRACE_SPANS=true.
+"""
+
+import os
+import threading
+import time
+from os import environ
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess, start_http_server)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+import tracing
+
+try:
+    import invokes
+except ImportError:  # services that make no outbound calls don't ship invokes.py
+    invokes = None
+
+METRICS_PORT = int(environ.get("METRICS_PORT", "8000"))
+
+# Under serve.py with several workers, how often (seconds) each worker copies its
+# invokes counters into the shared metrics files
+INVOKE_METRICS_INTERVAL = float(environ.get("INVOKE_METRICS_INTERVAL", "5"))
+
+# Return X-Trace-Spans on every composite reply, not just to X-Trace-Debug callers
+TRACE_SPANS = environ.get("TRACE_SPANS", "false").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUESTS = Counter(
+    "puki_http_requests_total", "HTTP requests handled",
+    ["service", "method", "route", "status"]
+)
+IN_FLIGHT = Gauge(
+    "puki_http_requests_in_flight", "HTTP requests currently being handled",
+    ["service"], multiprocess_mode="livesum"
+)
+LATENCY = Histogram(
+    "puki_http_request_duration_seconds", "HTTP request latency",
+    ["service", "method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+OUTBOUND_LATENCY = Histogram(
+    "puki_invoke_duration_seconds", "Latency of outbound invoke_http calls",
+    ["service", "target", "method", "code"], buckets=LATENCY_BUCKETS
+)
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+class InvokesCollector:
+    """Exports the invokes pool, breaker, coalescing and cache counters at scrape time."""
+
+    def collect(self):
+        pool = invokes.pool_stats()
+        family = CounterMetricFamily("puki_invoke_pool", "invokes connection pool events", labels=["event"])
+        for event in ("requests", "hits", "new_connections", "waits", "overflows", "recycled"):
+            family.add_metric([event], pool[event])
+        yield family
+
+        breakers = invokes.breaker_stats()
+        state = GaugeMetricFamily("puki_invoke_breaker_open", "1 if the circuit to a target is not closed", labels=["target"])
+        trips = CounterMetricFamily("puki_invoke_breaker_trips", "Times the circuit to a target opened", labels=["target"])
+        for target, stats in breakers.items():
+            state.add_metric([target], 0 if stats["state"] == "closed" else 1)
+            trips.add_metric([target], stats["trips"])
+        yield state
+        yield trips
+
+        coalesced = CounterMetricFamily("puki_invoke_coalesced", "GETs sent upstream (leader) or collapsed onto one", labels=["target", "role"])
+        for target, counts in invokes.coalesce_stats().items():
+            coalesced.add_metric([target, "leader"], counts["leaders"])
+            coalesced.add_metric([target, "collapsed"], counts["collapsed"])
+        yield coalesced
+
+        cache = invokes.cache_stats()
+        events = CounterMetricFamily("puki_invoke_cache", "invokes response cache events", labels=["event"])
+        for event in ("hits", "misses", "revalidated", "evictions"):
+            events.add_metric([event], cache[event])
+        yield events
+        yield GaugeMetricFamily("puki_invoke_cache_entries", "Entries in the invokes response cache", value=cache["entries"])
+
+
+class InvokesExporter:
+    """The same invokes metrics for serve.py with several workers, where a scrape
+       only sees what workers wrote to PROMETHEUS_MULTIPROC_DIR. Each worker copies
+       its counters there every INVOKE_METRICS_INTERVAL seconds, so port 8000 and
+       every worker's /metrics report the sum over workers.
+    """
+
+    def __init__(self):
+        # registry=None: multiprocess values reach the scrape through the files
+        self.pool = Counter("puki_invoke_pool", "invokes connection pool events", ["event"], registry=None)
+        self.breaker_open = Gauge("puki_invoke_breaker_open", "1 if the circuit to a target is not closed",
+                                  ["target"], registry=None, multiprocess_mode="livemax")
+        self.trips = Counter("puki_invoke_breaker_trips", "Times the circuit to a target opened", ["target"], registry=None)
+        self.coalesced = Counter("puki_invoke_coalesced", "GETs sent upstream (leader) or collapsed onto one",
+                                 ["target", "role"], registry=None)
+        self.cache = Counter("puki_invoke_cache", "invokes response cache events", ["event"], registry=None)
+        self.cache_entries = Gauge("puki_invoke_cache_entries", "Entries in the invokes response cache",
+                                   registry=None, multiprocess_mode="livesum")
+        self._seen = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _add(self, counter, labels, value):
+        # invokes keeps running totals; the shared counters take the increase
+        key = (id(counter), labels)
+        delta = value - self._seen.get(key, 0)
+        if delta > 0:
+            counter.labels(*labels).inc(delta)
+        self._seen[key] = value
+
+    def sync(self):
+        with self._lock:
+            pool = invokes.pool_stats()
+            for event in ("requests", "hits", "new_connections", "waits", "overflows", "recycled"):
+                self._add(self.pool, (event,), pool[event])
+
+            for target, stats in invokes.breaker_stats().items():
+                self.breaker_open.labels(target).set(0 if stats["state"] == "closed" else 1)
+                self._add(self.trips, (target,), stats["trips"])
+
+            for target, counts in invokes.coalesce_stats().items():
+                self._add(self.coalesced, (target, "leader"), counts["leaders"])
+                self._add(self.coalesced, (target, "collapsed"), counts["collapsed"])
+
+            cache = invokes.cache_stats()
+            for event in ("hits", "misses", "revalidated", "evictions"):
+                self._add(self.cache, (event,), cache[event])
+            self.cache_entries.set(cache["entries"])
+
+    def start(self):
+        """Start the copying thread in this process (once; workers forked from a
+           preloaded master start their own)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._seen = {}
+
+        def run():
+            while True:
+                time.sleep(INVOKE_METRICS_INTERVAL)
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"instrumentation: invokes metrics sync failed: {e}")
+
+        threading.Thread(target=run, name="invokes-metrics", daemon=True).start()
+
+
+_invokes_exporter = None
+
+
+def _exposition_registry():
+    # Under serve.py with several workers, aggregate what every worker wrote to
+    # PROMETHEUS_MULTIPROC_DIR (including the invokes counters, see InvokesExporter)
+    if "PROMETHEUS_MULTIPROC_DIR" not in environ:
+        return REGISTRY
+    if _invokes_exporter is not None:
+        _invokes_exporter.sync()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve the registry on its own port, once per process."""
+    global _server_started
+    with _server_lock:
+        if _server_started:
+            return
+        try:
+            start_http_server(port)
+            _server_started = True
+        except OSError as e:
+            # Another process (or service on the same host) already owns the port
+            print(f"instrumentation: metrics port {port} unavailable: {e}")
+
+
+def instrument(app, service, span_header=False, etag=False):
+    """Hook request metrics and tracing into a Flask app and expose /metrics.
+       span_header: return the span tree of outbound calls in X-Trace-Spans
+            when the caller sends X-Trace-Debug or TRACE_SPANS is set
+            (for composite services).
+       etag: tag GET replies with an ETag and answer 304 when the caller's
+            copy is current (for services whose replies invokes caches).
+    """
+
+    @app.before_request
+    def _start_timer():
+        if _invokes_exporter is not None:
+            _invokes_exporter.start()
+        g.metrics_started = time.perf_counter()
+        g.metrics_in_flight = True
+        IN_FLIGHT.labels(service).inc()
+        g.trace_token = tracing.begin(
+            request.headers.get(tracing.TRACE_HEADER),
+            request.headers.get(tracing.PARENT_HEADER),
+            TRACE_SPANS or tracing.debug_requested(request.headers.get(tracing.DEBUG_HEADER))
+        )
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            elapsed = time.perf_counter() - started
+            labels = (service, request.method, route, str(response.status_code))
+            REQUESTS.labels(*labels).inc()
+            LATENCY.labels(*labels).observe(elapsed)
+
+            trace = tracing.current()
+            if trace is not None:
+                response.headers[tracing.TRACE_HEADER] = trace.trace_id
+                if span_header and trace.debug and trace.spans:
+                    response.headers[tracing.SPANS_HEADER] = tracing.summary(service, trace)
+                if route != "/metrics":
+                    tracing.log(
+                        service, method=request.method, path=request.path,
+                        status=response.status_code, duration_ms=round(elapsed * 1000, 1),
+                        spans=len(trace.spans)
+                    )
+        return response
+
+    @app.teardown_request
+    def _end_request(exc):
+        if g.pop("metrics_in_flight", False):
+            IN_FLIGHT.labels(service).dec()
+        token = g.pop("trace_token", None)
+        if token is not None:
+            tracing.end(token)
+
+    if etag:
+        @app.after_request
+        def _conditional_get(response):
+            if request.method == "GET" and response.status_code == 200 and not response.is_streamed:
+                response.add_etag()
+                response.make_conditional(request)
+            return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(generate_latest(_exposition_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    _register_invokes(service)
+    if environ.get("METRICS_SERVER", "true").lower() == "true":
+        start_metrics_server()
+    return app
+
+
+_invokes_registered = False
+
+
+def _register_invokes(service):
+    global _invokes_registered, _invokes_exporter
+    if invokes is None or _invokes_registered:
+        return
+    _invokes_registered = True
+
+    def observe(target, method, code, seconds):
+        OUTBOUND_LATENCY.labels(service, target, method, str(code)).observe(seconds)
+
+    invokes.add_listener(observe)
+    if "PROMETHEUS_MULTIPROC_DIR" in environ:
+        _invokes_exporter = InvokesExporter()
+    else:
+        REGISTRY.register(InvokesCollector())
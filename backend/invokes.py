@@ -1,39 +1,626 @@
 #for checkout and housekeeping service
+import asyncio
+import contextvars
+import copy
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import environ
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import tracing
 
 SUPPORTED_HTTP_METHODS = set([
     "GET", "OPTIONS", "HEAD", "POST", "PUT", "PATCH", "DELETE"
 ])
 
-def invoke_http(url, method='GET', json=None, **kwargs):
+# Connection pool settings (per process, per target host)
+POOL_SIZE = int(environ.get("INVOKE_POOL_SIZE", "10"))
+POOL_MAX_IDLE = float(environ.get("INVOKE_POOL_MAX_IDLE", "60"))
+POOL_BLOCK = environ.get("INVOKE_POOL_BLOCK", "false").lower() == "true"
+
+# Timeouts in seconds; INVOKE_TIMEOUTS overrides them per target host,
+# e.g. INVOKE_TIMEOUTS="room=1:3,booking=1:5"
+CONNECT_TIMEOUT = float(environ.get("INVOKE_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(environ.get("INVOKE_READ_TIMEOUT", "10"))
+
+# Retries (idempotent methods only) with full-jitter backoff
+IDEMPOTENT_HTTP_METHODS = set(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = set([502, 503, 504])
+RETRIES = int(environ.get("INVOKE_RETRIES", "2"))
+RETRY_BACKOFF = float(environ.get("INVOKE_RETRY_BACKOFF", "0.05"))
+RETRY_BACKOFF_MAX = float(environ.get("INVOKE_RETRY_BACKOFF_MAX", "1"))
+# Every first attempt earns RETRY_BUDGET_RATIO retry tokens (capped at RETRY_BUDGET_MAX)
+# and every retry spends one, so retries stay a fraction of normal traffic
+RETRY_BUDGET_RATIO = float(environ.get("INVOKE_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX = float(environ.get("INVOKE_RETRY_BUDGET_MAX", "10"))
+
+# Circuit breaker: open after BREAKER_THRESHOLD consecutive failures,
+# allow one trial call after BREAKER_RESET seconds
+BREAKER_THRESHOLD = int(environ.get("INVOKE_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(environ.get("INVOKE_BREAKER_RESET", "30"))
+
+# Single-flight: concurrent identical GETs share one upstream request
+COALESCE_GETS = environ.get("INVOKE_COALESCE", "true").lower() == "true"
+
+# Opt-in response cache (invoke_http(..., cache_ttl=seconds)), LRU-bounded
+CACHE_SIZE = int(environ.get("INVOKE_CACHE_SIZE", "256"))
+
+# Upper bound on calls running at once for invoke_many / invoke_http_async
+MAX_CONCURRENCY = int(environ.get("INVOKE_MAX_CONCURRENCY", "16"))
+
+# Ids per request for invoke_batch (services accept up to BATCH_MAX_IDS)
+BATCH_CHUNK_SIZE = int(environ.get("INVOKE_BATCH_CHUNK_SIZE", "200"))
+
+_stats_lock = threading.Lock()
+_pool_stats = {
+    "requests": 0,         # requests sent through a pooled session
+    "hits": 0,             # requests served on an already open keep-alive connection
+    "new_connections": 0,  # TCP connections opened
+    "waits": 0,            # requests that found every connection busy (pool_block=True)
+    "overflows": 0,        # requests that found every connection busy (pool_block=False)
+    "recycled": 0          # host pools closed after sitting idle for POOL_MAX_IDLE
+}
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _pool_stats[key] += amount
+
+
+class _CountingPoolMixin:
+    """Counts connection reuse on top of urllib3's connection pool."""
+
+    def _get_conn(self, timeout=None):
+        if self.pool is not None and self.pool.empty():
+            _bump("waits" if self.block else "overflows")
+        conn = super()._get_conn(timeout=timeout)
+        if getattr(conn, "sock", None) is not None:
+            _bump("hits")
+        return conn
+
+    def _new_conn(self):
+        _bump("new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPPool,
+            "https": _CountingHTTPSPool
+        }
+
+
+class _HostPool:
+    """A keep-alive session dedicated to one scheme://host:port."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = _PooledAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, pool_block=POOL_BLOCK)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.last_used = time.monotonic()
+        self.active = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _acquire(url):
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    now = time.monotonic()
+    with _pools_lock:
+        pool = _pools.get(key)
+        # Drop pools nobody has used for a while so idle sockets don't pile up
+        if pool is not None and pool.active == 0 and now - pool.last_used > POOL_MAX_IDLE:
+            pool.session.close()
+            pool = None
+            _bump("recycled")
+        if pool is None:
+            pool = _pools[key] = _HostPool()
+        pool.active += 1
+        pool.last_used = now
+    return pool
+
+
+def _release(pool):
+    with _pools_lock:
+        pool.active -= 1
+        pool.last_used = time.monotonic()
+
+
+def pool_stats():
+    """Return connection pool counters for this process."""
+    with _stats_lock:
+        stats = dict(_pool_stats)
+    with _pools_lock:
+        stats["hosts"] = sorted(_pools)
+    return stats
+
+
+def close_pools():
+    """Close every pooled connection (e.g. before a worker exits)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.session.close()
+        _pools.clear()
+
+
+def _parse_timeouts(spec):
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        target, _, value = item.partition("=")
+        connect, _, read = value.partition(":")
+        timeouts[target.strip()] = (float(connect), float(read or connect))
+    return timeouts
+
+
+_timeouts = _parse_timeouts(environ.get("INVOKE_TIMEOUTS", ""))
+
+
+def _target(url):
+    return urlsplit(url).hostname or url
+
+
+def set_timeout(target, connect, read):
+    """Override the (connect, read) timeout used for one target host."""
+    _timeouts[target] = (connect, read)
+
+
+def get_timeout(target):
+    return _timeouts.get(target, (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of first attempts."""
+
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, maximum=RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.maximum = maximum
+        self.tokens = maximum
+        self.exhausted = 0
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.maximum, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+class CircuitBreaker:
+    """Per-target breaker: closed -> open after repeated failures -> half_open trial -> closed."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = "half_open"
+                self.trial_in_flight = False
+            if self.state == "half_open":
+                if self.trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self.trial_in_flight = True
+            return True
+
+    def record(self, success):
+        with self.lock:
+            self.trial_in_flight = False
+            if success:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_budgets = {}
+_guards_lock = threading.Lock()
+
+
+def _guards(target):
+    with _guards_lock:
+        if target not in _breakers:
+            _breakers[target] = CircuitBreaker()
+            _budgets[target] = RetryBudget()
+        return _breakers[target], _budgets[target]
+
+
+def breaker_stats():
+    """Return circuit breaker state, trip counts and retry budget per target host."""
+    with _guards_lock:
+        targets = list(_breakers.items())
+    stats = {}
+    for target, breaker in targets:
+        budget = _budgets[target]
+        with breaker.lock:
+            stats[target] = {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "trips": breaker.trips,
+                "rejected": breaker.rejected
+            }
+        with budget.lock:
+            stats[target]["retry_tokens"] = round(budget.tokens, 2)
+            stats[target]["retries_denied"] = budget.exhausted
+    return stats
+
+
+def _backoff(attempt):
+    # Full jitter: sleep anywhere between 0 and the capped exponential delay
+    time.sleep(random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * (2 ** attempt))))
+
+
+# Monolith mode: resolver(url) -> in-process Flask app or None (see monolith.py)
+_local_resolver = None
+
+
+def set_local_dispatch(resolver):
+    """Dispatch calls whose url resolver() maps to a Flask app in-process instead of over HTTP."""
+    global _local_resolver
+    _local_resolver = resolver
+
+
+class _LocalResponse:
+    """The parts of requests.Response that invoke_http reads, backed by a Flask test response."""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.get_data()
+        self._response = response
+
+    def json(self):
+        return self._response.get_json(force=True)
+
+
+def _dispatch_local(app, method, url, json, kwargs):
+    # No socket: the call runs through the target app's WSGI stack in this thread
+    response = app.test_client().open(url, method=method.upper(), json=json, headers=kwargs.get("headers"))
+    return _LocalResponse(response)
+
+
+def _send(target, method, url, json, retries, kwargs):
+    """Send one call through the pooled session, retrying idempotent methods."""
+    if _local_resolver is not None:
+        app = _local_resolver(url)
+        if app is not None:
+            return _dispatch_local(app, method, url, json, kwargs)
+
+    _, budget = _guards(target)
+    budget.deposit()
+    if method.upper() not in IDEMPOTENT_HTTP_METHODS:
+        retries = 0
+    kwargs.setdefault("timeout", get_timeout(target))
+
+    attempt = 0
+    while True:
+        pool = _acquire(url)
+        try:
+            r = pool.session.request(method, url, json=json, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt < retries and budget.withdraw():
+                _backoff(attempt)
+                attempt += 1
+                continue
+            raise
+        finally:
+            _release(pool)
+            _bump("requests")
+
+        if r.status_code in RETRY_STATUSES and attempt < retries and budget.withdraw():
+            _backoff(attempt)
+            attempt += 1
+            continue
+        return r
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.waiters = 0
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+_coalesce_stats = {}
+
+
+def coalesce_stats():
+    """Return, per target host, how many GETs went upstream (leaders) and how many were collapsed onto them."""
+    with _flights_lock:
+        return {target: dict(counts) for target, counts in _coalesce_stats.items()}
+
+
+def _coalesced(url, fetch):
+    with _flights_lock:
+        flight = _flights.get(url)
+        leader = flight is None
+        if leader:
+            flight = _flights[url] = _Flight()
+        else:
+            flight.waiters += 1
+        counts = _coalesce_stats.setdefault(_target(url), {"leaders": 0, "collapsed": 0})
+        counts["leaders" if leader else "collapsed"] += 1
+
+    if not leader:
+        flight.done.wait()
+        return copy.deepcopy(flight.result)
+
+    try:
+        flight.result = fetch()
+    finally:
+        with _flights_lock:
+            del _flights[url]
+            shared = flight.waiters > 0
+        flight.done.set()
+    # Followers copy the shared reply, so the leader must not hand out the original either
+    return copy.deepcopy(flight.result) if shared else flight.result
+
+
+class _CacheEntry:
+    def __init__(self, result, etag, ttl):
+        self.result = result
+        self.etag = etag
+        self.expires_at = time.monotonic() + ttl
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+
+
+def cache_stats():
+    """Return response cache counters (hits, misses, 304 revalidations, LRU evictions)."""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats["entries"] = len(_cache)
+    return stats
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cache_lookup(url):
+    """Return (fresh copy or None, entry) for a cached url."""
+    with _cache_lock:
+        entry = _cache.get(url)
+        if entry is not None:
+            _cache.move_to_end(url)
+            if entry.expires_at > time.monotonic():
+                _cache_stats["hits"] += 1
+                return copy.deepcopy(entry.result), entry
+        _cache_stats["misses"] += 1
+        return None, entry
+
+
+def _cache_store(url, entry):
+    with _cache_lock:
+        _cache[url] = entry
+        _cache.move_to_end(url)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+
+
+def _fetch_cached(url, retries, ttl, stale):
+    # Revalidate a stale entry with If-None-Match; a 304 keeps the cached reply
+    kwargs = {"headers": {"If-None-Match": stale.etag}} if stale is not None and stale.etag else {}
+    result, r = _invoke(url, "GET", None, retries, kwargs)
+    if r is not None and r.status_code == 304 and stale is not None:
+        with _cache_lock:
+            _cache_stats["revalidated"] += 1
+        _cache_store(url, _CacheEntry(stale.result, stale.etag, ttl))
+        return copy.deepcopy(stale.result)
+    if r is not None and r.status_code == 200:
+        _cache_store(url, _CacheEntry(copy.deepcopy(result), r.headers.get("ETag"), ttl))
+    return result
+
+
+def invoke_http(url, method='GET', json=None, retries=None, coalesce=None, cache_ttl=None, **kwargs):
     """A simple wrapper for requests methods.
        url: the url of the http service;
        method: the http method;
        data: the JSON input when needed by the http method;
+       retries: retries for idempotent methods (defaults to INVOKE_RETRIES);
+       coalesce: share one upstream request between identical concurrent GETs
+            (defaults to INVOKE_COALESCE);
+       cache_ttl: cache successful GET replies for this many seconds, then
+            revalidate them with the ETag the service sent;
        return: the JSON reply content from the http service if the call succeeds;
             otherwise, return a JSON object with a "code" name-value pair.
     """
+    plain_get = method.upper() == "GET" and json is None and not kwargs
+    if cache_ttl and plain_get:
+        cached, stale = _cache_lookup(url)
+        if cached is not None:
+            return cached
+        fetch = partial(_fetch_cached, url, retries, cache_ttl, stale)
+    else:
+        def fetch():
+            return _invoke(url, method, json, retries, kwargs)[0]
+
+    if coalesce is None:
+        coalesce = COALESCE_GETS
+    if coalesce and plain_get:
+        return _coalesced(url, fetch)
+    return fetch()
+
+
+_listeners = []
+
+
+def add_listener(listener):
+    """Register listener(target, method, code, seconds), called after every upstream call."""
+    _listeners.append(listener)
+
+
+def _notify(url, method, result, started):
+    elapsed = time.perf_counter() - started
+    for listener in _listeners:
+        try:
+            listener(_target(url), method.upper(), result.get("code", 500), elapsed)
+        except Exception as e:
+            print("invokes: listener failed:", str(e))
+
+
+def _invoke(url, method, json, retries, kwargs):
+    """Send one call; return (reply envelope, requests response or None)."""
+    started = time.perf_counter()
+    # Forward the caller's trace id so the downstream hop joins the same trace
+    trace_headers = tracing.outgoing_headers()
+    if trace_headers:
+        kwargs = dict(kwargs, headers=dict(kwargs.get("headers") or {}, **trace_headers))
+    result, r = _call(url, method, json, retries, kwargs)
+    if _listeners:
+        _notify(url, method, result, started)
+    tracing.record_span(
+        _target(url), method.upper(), urlsplit(url).path, started, result.get("code", 500),
+        r.headers.get(tracing.SPANS_HEADER) if r is not None else None
+    )
+    return result, r
+
+
+def _call(url, method, json, retries, kwargs):
+    r = None
     try:
-        if method.upper() in SUPPORTED_HTTP_METHODS:
-            r = requests.request(method, url, json=json, **kwargs)
-        else:
+        if method.upper() not in SUPPORTED_HTTP_METHODS:
             raise Exception("HTTP method {} unsupported.".format(method))
 
+        target = _target(url)
+        breaker, _ = _guards(target)
+        if not breaker.allow():
+            return {"code": 503, "message": "Circuit open for service: " + target + ". Call to " + url + " rejected."}, None
+
+        try:
+            r = _send(target, method, url, json, RETRIES if retries is None else retries, kwargs)
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(r.status_code < 500)
+
         # Try to parse the response as JSON
         try:
             result = r.json() if len(r.content) > 0 else {}
         except Exception as e:
-            return {"code": 500, "message": "Invalid JSON output from service: " + url + ". " + str(e)}
+            return {"code": 500, "message": "Invalid JSON output from service: " + url + ". " + str(e)}, r
 
         # If the response has a code field, use that
         if isinstance(result, dict) and "code" in result:
-            return result
+            return result, r
 
         # Otherwise, create a response based on the status code
         if r.status_code in range(200, 300):
-            return {"code": r.status_code, "data": result}
+            return {"code": r.status_code, "data": result}, r
         else:
-            return {"code": r.status_code, "message": "HTTP error: " + str(r.status_code)}
+            return {"code": r.status_code, "message": "HTTP error: " + str(r.status_code)}, r
 
     except Exception as e:
-        return {"code": 500, "message": "invocation of service fails: " + url + ". " + str(e)}
+        return {"code": 500, "message": "invocation of service fails: " + url + ". " + str(e)}, r
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="invokes")
+
+
+def _submit(call):
+    # Each call runs in a copy of the caller's context so context variables follow it
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, partial(invoke_http, **call))
+
+
+async def invoke_http_async(url, method='GET', json=None, **kwargs):
+    """Async counterpart of invoke_http.
+       Runs the call on the shared invokes thread pool so it reuses the same
+       keep-alive connections; returns the same {"code": ...} envelope.
+    """
+    call = dict(kwargs, url=url, method=method, json=json)
+    return await asyncio.wrap_future(_submit(call))
+
+
+async def invoke_many_async(calls):
+    """Async counterpart of invoke_many."""
+    return list(await asyncio.gather(*(asyncio.wrap_future(_submit(call)) for call in calls)))
+
+
+def invoke_many(calls):
+    """Run independent calls concurrently.
+       calls: a list of dicts holding invoke_http arguments, e.g.
+            [{"url": guest_url}, {"url": booking_url, "method": "POST", "json": payload}];
+       return: the replies in the same order as calls, each in the
+            {"code": ..., "data": ...} envelope of invoke_http.
+    """
+    futures = [_submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def invoke_batch(url, ids, chunk_size=None, key="ids", **kwargs):
+    """POST a list of ids to a batch endpoint (e.g. /booking/batch) in chunks.
+       Chunks are sent concurrently through invoke_many and their replies merged:
+       list values in "data" (the rows, "missing") are concatenated in chunk order.
+       return: one {"code": 200, "data": ...} envelope, or the first failed
+            chunk's reply if any chunk fails.
+    """
+    ids = list(ids)
+    chunk_size = chunk_size or BATCH_CHUNK_SIZE
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)] or [[]]
+    replies = invoke_many([
+        dict(kwargs, url=url, method="POST", json={key: chunk}) for chunk in chunks
+    ])
+
+    merged = {}
+    for reply in replies:
+        if reply.get("code") != 200:
+            return reply
+        for name, value in (reply.get("data") or {}).items():
+            if isinstance(value, list):
+                merged.setdefault(name, []).extend(value)
+            else:
+                merged.setdefault(name, value)
+    return {"code": 200, "data": merged}
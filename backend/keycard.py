@@ -1,15 +1,17 @@
 import random
 import string
-import requests
+import invokes
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from flask_sqlalchemy import SQLAlchemy
 from os import environ
 import traceback
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "keycard")
 
 # Database Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL")
@@ -54,9 +56,8 @@ class Keycard(db.Model):
     def generate_pin():
         return random.randint(0, 999999)  # Return integer instead of string
 
-# Auto-create table if not already present
-with app.app_context():
-    db.create_all()
+# Table is created by bootstrap.py, not at import
+SCHEMA_VERSION = 1
 
 # Health check
 @app.route("/health")
@@ -85,12 +86,12 @@ def generate_keycard():
 
         # Get check-out date from booking service
         booking_url = environ.get("BOOKING_URL", "http://booking:5002")
-        response = requests.get(f"{booking_url}/booking/{data['booking_id']}")
+        booking_response = invokes.invoke_http(f"{booking_url}/booking/{data['booking_id']}", method="GET")
 
-        if response.status_code != 200:
+        if booking_response.get("code") != 200:
             return jsonify({"code": 400, "message": "Invalid booking ID."}), 400
 
-        booking_data = response.json()["data"]
+        booking_data = booking_response["data"]
         check_out = booking_data.get("check_out") or booking_data.get("check_out_date")
 
         if not check_out:
@@ -0,0 +1,178 @@
+"""
+Keyset pagination, field projection and NDJSON streaming for list endpoints.
+
+    GET /booking?limit=100                     first page, in primary key order
+    GET /booking?after=<next>&limit=100        the page after a cursor
+    GET /booking?fields=booking_id,room_id     only these columns
+    GET /booking?format=ndjson                 every row, one JSON object per line
+
+A page is "WHERE key > :cursor ORDER BY key LIMIT n", so the database walks
+the primary key index from the cursor instead of counting past an offset, and
+page 10,000 costs the same as page 1. NDJSON responses are produced the same
+way, LIST_STREAM_BATCH rows at a time, and written out as each batch arrives,
+so memory stays flat however many rows the table holds.
+
+Plain GETs without any of these arguments keep their original response.
+
+Batch endpoints (POST {"ids": [...]}) resolve many rows by key with one
+IN query; see respond_batch().
+"""
+
+import json
+from datetime import date, datetime
+from os import environ
+
+from flask import Response, jsonify, request, stream_with_context
+from sqlalchemy import select, tuple_
+
+DEFAULT_LIMIT = int(environ.get("LIST_DEFAULT_LIMIT", "100"))
+MAX_LIMIT = int(environ.get("LIST_MAX_LIMIT", "1000"))
+STREAM_BATCH = int(environ.get("LIST_STREAM_BATCH", "500"))
+
+BATCH_MAX_IDS = int(environ.get("BATCH_MAX_IDS", "500"))
+
+LIST_ARGS = ("after", "limit", "fields", "format")
+
+
+def requested():
+    """True if the request uses any list argument."""
+    return any(name in request.args for name in LIST_ARGS)
+
+
+def _value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _fields(model, fields):
+    names = [column.name for column in model.__table__.columns]
+    if not fields:
+        return names
+    wanted = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in wanted if name not in names]
+    if unknown or not wanted:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Valid fields: {', '.join(names)}.")
+    return wanted
+
+
+def _limit(value):
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, MAX_LIMIT)
+
+
+def _cursor(value, key):
+    # Composite cursors are comma-separated; the last part may itself contain commas
+    parts = value.split(",", len(key) - 1)
+    if len(parts) != len(key):
+        raise ValueError("Invalid cursor.")
+    try:
+        return tuple(parse(part) for (_, parse), part in zip(key, parts))
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+def _page(model, columns, key, where, cursor, limit):
+    key_columns = [getattr(model, name) for name, _ in key]
+    query = select(*[getattr(model, name) for name in columns]).where(*where).order_by(*key_columns)
+    if cursor is not None:
+        if len(key_columns) == 1:
+            query = query.where(key_columns[0] > cursor[0])
+        else:
+            query = query.where(tuple_(*key_columns) > tuple_(*cursor))
+    return query.limit(limit)
+
+
+def respond(session, model, key, envelope, where=()):
+    """Answer a list request for `model` from its query arguments.
+       key: [(column, parse), ...] - the unique ordering key, e.g. [("booking_id", int)]
+       envelope: name of the list in the JSON response's "data" object
+       where: extra filter clauses
+    """
+    args = request.args
+    try:
+        fields = _fields(model, args.get("fields"))
+        cursor = _cursor(args["after"], key) if args.get("after") else None
+        limit = _limit(args["limit"]) if "limit" in args else None
+        output = args.get("format", "json")
+        if output not in ("json", "ndjson"):
+            raise ValueError("format must be json or ndjson.")
+    except ValueError as e:
+        return jsonify({"code": 400, "message": str(e)}), 400
+
+    key_names = [name for name, _ in key]
+    # Key columns are always read so the next cursor can be built
+    columns = fields + [name for name in key_names if name not in fields]
+
+    def project(row):
+        values = row._mapping
+        return {name: _value(values[name]) for name in fields}
+
+    def next_cursor(row):
+        return ",".join(str(_value(row._mapping[name])) for name in key_names)
+
+    if output == "ndjson":
+        def generate(cursor, remaining):
+            while remaining is None or remaining > 0:
+                size = STREAM_BATCH if remaining is None else min(STREAM_BATCH, remaining)
+                rows = session.execute(_page(model, columns, key, where, cursor, size)).all()
+                if rows:
+                    yield "".join(json.dumps(project(row)) + "\n" for row in rows)
+                if len(rows) < size:
+                    return
+                cursor = tuple(rows[-1]._mapping[name] for name in key_names)
+                if remaining is not None:
+                    remaining -= len(rows)
+
+        return Response(stream_with_context(generate(cursor, limit)), mimetype="application/x-ndjson")
+
+    limit = limit or DEFAULT_LIMIT
+    # One extra row tells us whether there is a next page
+    rows = session.execute(_page(model, columns, key, where, cursor, limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        "code": 200,
+        "data": {
+            envelope: [project(row) for row in rows],
+            "next": next_cursor(rows[-1]) if more else None
+        }
+    }), 200
+
+
+def respond_batch(session, model, key, envelope, normalize=None):
+    """Answer POST {"ids": [...]} with the matching rows and the ids that matched none.
+       key: (column, parse), e.g. ("booking_id", int)
+       normalize: optional function applied to each parsed id (e.g. zero-padding)
+    """
+    name, parse = key
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    if not isinstance(ids, list):
+        return jsonify({"code": 400, "message": "ids must be a list."}), 400
+    if len(ids) > BATCH_MAX_IDS:
+        return jsonify({"code": 400, "message": f"At most {BATCH_MAX_IDS} ids per batch."}), 400
+    try:
+        ids = [parse(i) for i in ids]
+    except (TypeError, ValueError):
+        return jsonify({"code": 400, "message": f"ids must be valid {name} values."}), 400
+    if normalize is not None:
+        ids = [normalize(i) for i in ids]
+    # Keep the caller's order, drop repeats
+    ids = list(dict.fromkeys(ids))
+
+    column = getattr(model, name)
+    rows = session.scalars(select(model).where(column.in_(ids))).all() if ids else []
+    found = {getattr(row, name): row for row in rows}
+    return jsonify({
+        "code": 200,
+        "data": {
+            envelope: [found[i].json() for i in ids if i in found],
+            "missing": [i for i in ids if i not in found]
+        }
+    }), 200
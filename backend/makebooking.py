@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from datetime import datetime
 import pika
 import json
@@ -9,6 +10,7 @@ import traceback
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "makebooking", span_header=True)
 
 # Service URLs - use Docker service names instead of localhost
 BOOKING_URL = environ.get('BOOKING_URL', 'http://booking:5002')
@@ -16,6 +18,9 @@ GUEST_URL = environ.get('GUEST_URL', 'http://guest:5011')
 ROOM_URL = environ.get('ROOM_URL', 'http://room:5008')
 DYNAMICPRICE_URL = environ.get('DYNAMICPRICE_URL', 'http://dynamicprice:5016')
 
+# Largest group accepted by /makebooking/group (booking's BULK_MAX_BOOKINGS)
+GROUP_MAX_BOOKINGS = int(environ.get('GROUP_MAX_BOOKINGS', '100'))
+
 # Health check
 @app.route("/health", methods=["GET"])
 def health_check():
@@ -48,19 +53,26 @@ def create_booking():
         if check_out <= check_in:
             return jsonify({"code": 400, "message": "Check-out date must be later than check-in date."}), 400
 
-        # Check guest
+        # Check guest, room type availability and fetch dynamic price concurrently
         guest_url = f"{GUEST_URL}/guest/{data['guest_id']}"
-        guest_response = invokes.invoke_http(guest_url, method="GET")
+        availability_url = f"{BOOKING_URL}/booking/availability/type?room_type={room_type}&check_in={check_in}&check_out={check_out}"
+        price_url = f"{DYNAMICPRICE_URL}/dynamicprice?room_type={room_type}&date={check_in}"
+        print(f"Calling dynamic price URL: {price_url}")
+        guest_response, availability_response, dynamic_price_response = invokes.invoke_many([
+            {"url": guest_url, "method": "GET"},
+            {"url": availability_url, "method": "GET"},
+            {"url": price_url, "method": "GET"}
+        ])
         print("Guest response:", guest_response)
+        print("Availability response:", availability_response)
+        print("Dynamic price response:", dynamic_price_response)
 
         if not isinstance(guest_response, dict) or guest_response.get("code") != 200:
             return jsonify({"code": 400, "message": "Invalid guest_id. Guest does not exist."}), 400
 
-        # Fetch dynamic price
-        price_url = f"{DYNAMICPRICE_URL}/dynamicprice?room_type={room_type}&date={check_in}"
-        print(f"Calling dynamic price URL: {price_url}")
-        dynamic_price_response = invokes.invoke_http(price_url, method="GET")
-        print("Dynamic price response:", dynamic_price_response)
+        # Booking creation enforces inventory anyway; this only fails fast on a sold-out stay
+        if availability_response.get("code") == 400:
+            return jsonify({"code": 400, "message": f"No {room_type} rooms available for the selected dates."}), 400
 
         if not isinstance(dynamic_price_response, dict):
             return jsonify({"code": 500, "message": f"Invalid response from dynamic price service: {dynamic_price_response}"}), 500
@@ -102,6 +114,99 @@ def create_booking():
         traceback.print_exc()
         return jsonify({"code": 500, "message": f"Internal server error: {str(e)}"}), 500
 
+# Make a group booking: every room is created or none is.
+# Body: {"guest_id": 1, "bookings": [{"room_type": ..., "check_in": ..., "check_out": ...[, "guest_id": ...]}, ...]}
+@app.route("/makebooking/group", methods=["POST"])
+def create_group_booking():
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get("bookings")
+        if not isinstance(items, list) or not items:
+            return jsonify({"code": 400, "message": "bookings must be a non-empty list."}), 400
+        if len(items) > GROUP_MAX_BOOKINGS:
+            return jsonify({"code": 400, "message": f"At most {GROUP_MAX_BOOKINGS} bookings per group."}), 400
+
+        # Validate the whole group before calling anything
+        bookings = []
+        errors = []
+        for index, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            guest_id = item.get("guest_id", data.get("guest_id"))
+            if not guest_id or not all(item.get(field) for field in ("room_type", "check_in", "check_out")):
+                errors.append({"index": index, "code": 400, "message": "Missing required fields."})
+                continue
+            try:
+                guest_id = int(guest_id)
+            except (TypeError, ValueError):
+                errors.append({"index": index, "code": 400, "message": "Invalid guest_id."})
+                continue
+            try:
+                check_in = datetime.strptime(item["check_in"], "%Y-%m-%d").date()
+                check_out = datetime.strptime(item["check_out"], "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                errors.append({"index": index, "code": 400, "message": "Invalid date format. Use YYYY-MM-DD."})
+                continue
+            if check_out <= check_in:
+                errors.append({"index": index, "code": 400, "message": "Check-out date must be later than check-in date."})
+                continue
+            bookings.append({
+                "guest_id": guest_id,
+                "room_type": item["room_type"],
+                "check_in": str(check_in),
+                "check_out": str(check_out)
+            })
+        if errors:
+            return jsonify({"code": 400, "message": "Group rejected; no bookings were created.", "data": {"results": errors}}), 400
+
+        # Check every distinct guest with the batch endpoint (chunked by invoke_batch)
+        guest_ids = list(dict.fromkeys(b["guest_id"] for b in bookings))
+        guest_response = invokes.invoke_batch(f"{GUEST_URL}/guest/batch", guest_ids)
+
+        if guest_response.get("code") != 200:
+            return jsonify({"code": 500, "message": "Failed to check guests", "details": guest_response}), 500
+        missing = set(guest_response["data"].get("missing", []))
+        if missing:
+            errors = [
+                {"index": index, "code": 400, "message": "Invalid guest_id. Guest does not exist."}
+                for index, b in enumerate(bookings) if b["guest_id"] in missing
+            ]
+            return jsonify({"code": 400, "message": "Group rejected; no bookings were created.", "data": {"results": errors}}), 400
+
+        # Price each distinct (room_type, check_in) once, concurrently
+        price_keys = list(dict.fromkeys((b["room_type"], b["check_in"]) for b in bookings))
+        price_responses = invokes.invoke_many([
+            {"url": f"{DYNAMICPRICE_URL}/dynamicprice?room_type={room_type}&date={check_in}", "method": "GET"}
+            for room_type, check_in in price_keys
+        ])
+
+        prices = {}
+        for key, response in zip(price_keys, price_responses):
+            final_price = response.get("data", {}).get("final_price") if response.get("code") == 200 else None
+            if final_price is None:
+                return jsonify({"code": 500, "message": f"Failed to get dynamic price for {key[0]} on {key[1]}", "details": response}), 500
+            prices[key] = final_price
+
+        for b in bookings:
+            b["price"] = prices[(b["room_type"], b["check_in"])]
+
+        # Booking reserves inventory for the whole group and inserts it in one transaction
+        booking_response = invokes.invoke_http(f"{BOOKING_URL}/booking/bulk", method="POST", json={"bookings": bookings})
+        print("Group booking response:", booking_response.get("code"), booking_response.get("message"))
+
+        if booking_response.get("code") != 201:
+            code = booking_response.get("code", 500)
+            return jsonify({
+                "code": code if code in (400, 503) else 500,
+                "message": f"Group booking failed: {booking_response.get('message')}",
+                "data": booking_response.get("data")
+            }), code if code in (400, 503) else 500
+
+        return jsonify({"code": 201, "data": booking_response["data"]}), 201
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"code": 500, "message": f"Internal server error: {str(e)}"}), 500
+
 # def publish_notification(mobile_number, message):
 #     try:
 #         connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
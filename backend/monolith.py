@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+Single-process "monolith mode" for small properties and tests.
+
+    python monolith.py [port]          # Werkzeug server, default port 5000
+    python serve.py monolith 5000      # production launcher
+
+Loads every service app into one process and routes each request to the app
+that owns its first path segment (/booking/..., /room/..., /checkin, ...), so
+the existing URLs keep working. invokes.invoke_http calls to any of these
+services run through the target app in-process, without opening a socket.
+"""
+
+import importlib
+import sys
+from urllib.parse import urlsplit
+
+from werkzeug.exceptions import NotFound
+
+import invokes
+
+SERVICES = [
+    "booking", "room", "guest", "keycard", "price", "promotion", "roster", "housekeeper",
+    "housekeeping", "checkin", "checkout", "makebooking", "dynamicprice"
+]
+
+# Routes every service defines; they are answered by the first app
+SHARED_SEGMENTS = set(["health", "metrics", "static"])
+
+
+class Monolith:
+    """WSGI app that dispatches on the first path segment to the owning service."""
+
+    def __init__(self, services):
+        self.apps = {}
+        self.owners = {}
+        for service in services:
+            app = importlib.import_module(service).app
+            self.apps[service] = app
+            for rule in app.url_map.iter_rules():
+                segment = self.segment(rule.rule)
+                if segment in SHARED_SEGMENTS or segment.startswith("<"):
+                    continue
+                owner = self.owners.setdefault(segment, service)
+                if owner != service:
+                    raise RuntimeError(f"/{segment} is served by both {owner} and {service}")
+        self.default = self.apps[services[0]]
+
+    @staticmethod
+    def segment(path):
+        return path.lstrip("/").split("/", 1)[0]
+
+    def app_for_path(self, path):
+        segment = self.segment(path)
+        if segment in SHARED_SEGMENTS:
+            return self.default
+        owner = self.owners.get(segment)
+        return self.apps[owner] if owner else None
+
+    def app_for_url(self, url):
+        return self.app_for_path(urlsplit(url).path)
+
+    def __call__(self, environ, start_response):
+        app = self.app_for_path(environ.get("PATH_INFO", ""))
+        if app is None:
+            return NotFound()(environ, start_response)
+        return app(environ, start_response)
+
+
+app = Monolith(SERVICES)
+invokes.set_local_dispatch(app.app_for_url)
+
+
+if __name__ == "__main__":
+    from werkzeug.serving import run_simple
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    run_simple("0.0.0.0", port, app, threaded=True)
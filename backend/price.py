@@ -1,13 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from flask_sqlalchemy import SQLAlchemy
 from os import environ
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from datetime import datetime
+import click
 
 app = Flask(__name__)
 
 CORS(app)
+instrumentation.instrument(app, "price", etag=True)
 
 # Database Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL")
@@ -15,15 +18,27 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# Room types are matched case-insensitively through this key, which is indexed;
+# lower(room_type) in a WHERE clause can't use an index
+def room_type_key(room_type):
+    return room_type.strip().lower()
+
 # Define the Price model
 class Price(db.Model):
     __tablename__ = "price"
+    __table_args__ = (db.Index("ix_price_room_type_key", "room_type_key"),)
 
     room_id = db.Column(db.String(36), primary_key=True)
     floor = db.Column(db.Integer, nullable=False)
     room_type = db.Column(db.String(50), nullable=False)
+    room_type_key = db.Column(db.String(50), nullable=True)
     price = db.Column(db.Float, nullable=False)
 
+    @db.validates("room_type")
+    def set_room_type_key(self, key, value):
+        self.room_type_key = room_type_key(value)
+        return value
+
 
     def json(self):
         return {
@@ -33,10 +48,162 @@ class Price(db.Model):
             "price": self.price,
         }
     
-#create table
-with app.app_context():
-    db.create_all()
-    
+
+# Aggregate per room type, kept current by every price write
+class PriceSummary(db.Model):
+    __tablename__ = "price_summary"
+
+    room_type_key = db.Column(db.String(50), primary_key=True)
+    room_type = db.Column(db.String(50), nullable=False)
+    rooms = db.Column(db.Integer, nullable=False)
+    min_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+    # The price most rooms of the type have (the lowest one on a tie)
+    representative_price = db.Column(db.Float, nullable=False)
+
+    def json(self):
+        return {
+            "room_type": self.room_type,
+            "rooms": self.rooms,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "representative_price": self.representative_price
+        }
+
+
+# Effective-dated rate per room type: the rate in force on a day is the one with
+# the latest effective_from on or before it (a reverse scan of the primary key)
+class RatePeriod(db.Model):
+    __tablename__ = "rate_period"
+
+    room_type_key = db.Column(db.String(50), primary_key=True)
+    effective_from = db.Column(db.Date, primary_key=True)
+    room_type = db.Column(db.String(50), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+
+    def json(self):
+        return {
+            "room_type": self.room_type,
+            "effective_from": str(self.effective_from),
+            "price": self.price
+        }
+
+# The rate period last applied to a type's rooms. apply-rates reprices a type only
+# when a different period comes into force, so per-room prices set in between stay
+class RateApplied(db.Model):
+    __tablename__ = "rate_applied"
+
+    room_type_key = db.Column(db.String(50), primary_key=True)
+    effective_from = db.Column(db.Date, nullable=False)
+
+# Schema version applied by bootstrap.py
+SCHEMA_VERSION = 4
+
+# Recompute the summary rows of these room type keys from the price table
+# (in the caller's transaction, so readers never see a summary ahead of the prices)
+def refresh_summary(keys):
+    db.session.flush()
+    for key in set(keys):
+        counts = db.session.execute(
+            db.select(Price.price, db.func.count(), db.func.min(Price.room_type))
+            .filter(Price.room_type_key == key)
+            .group_by(Price.price)
+        ).all()
+        summary = db.session.get(PriceSummary, key)
+        if not counts:
+            if summary:
+                db.session.delete(summary)
+            continue
+        if summary is None:
+            summary = PriceSummary(room_type_key=key)
+            db.session.add(summary)
+        summary.room_type = min(room_type for _, _, room_type in counts)
+        summary.rooms = sum(count for _, count, _ in counts)
+        summary.min_price = min(price for price, _, _ in counts)
+        summary.max_price = max(price for price, _, _ in counts)
+        summary.representative_price = min(counts, key=lambda row: (-row[1], row[0]))[0]
+
+def rate_in_force(key, day):
+    return db.session.scalar(
+        db.select(RatePeriod)
+        .filter(RatePeriod.room_type_key == key, RatePeriod.effective_from <= day)
+        .order_by(RatePeriod.effective_from.desc())
+        .limit(1)
+    )
+
+# Set every room of these types to the type's rate in force on `day`, in one
+# correlated UPDATE, and record the period applied; types with no rate period
+# yet keep their room prices
+def apply_rates(keys, day):
+    in_force = (
+        RatePeriod.room_type_key == Price.room_type_key,
+        RatePeriod.effective_from <= day
+    )
+    rate = (
+        db.select(RatePeriod.price).where(*in_force)
+        .order_by(RatePeriod.effective_from.desc()).limit(1)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        db.update(Price)
+        .where(Price.room_type_key.in_(keys), db.exists().where(*in_force))
+        .values(price=rate)
+        .execution_options(synchronize_session=False)
+    )
+    for key in set(keys):
+        period = rate_in_force(key, day)
+        if period is None:
+            continue
+        applied = db.session.get(RateApplied, key)
+        if applied is None:
+            db.session.add(RateApplied(room_type_key=key, effective_from=period.effective_from))
+        else:
+            applied.effective_from = period.effective_from
+    refresh_summary(keys)
+
+# Types whose rate in force on `day` is not the period last applied to their rooms
+def pending_rates(day):
+    in_force = db.session.execute(
+        db.select(RatePeriod.room_type_key, db.func.max(RatePeriod.effective_from))
+        .filter(RatePeriod.effective_from <= day)
+        .group_by(RatePeriod.room_type_key)
+    ).all()
+    applied = dict(db.session.execute(db.select(RateApplied.room_type_key, RateApplied.effective_from)).all())
+    return {key for key, effective_from in in_force if applied.get(key) != effective_from}
+
+# Record rate periods, {(room_type_key, effective_from): (room_type, price)}, replacing
+# any already set for the same day; rates already in force are applied to the rooms
+def schedule_rates(rates):
+    db.session.execute(
+        db.delete(RatePeriod).where(
+            db.tuple_(RatePeriod.room_type_key, RatePeriod.effective_from).in_(list(rates))
+        )
+    )
+    db.session.execute(db.insert(RatePeriod), [
+        {"room_type_key": key, "effective_from": day, "room_type": room_type, "price": price}
+        for (key, day), (room_type, price) in rates.items()
+    ])
+    today = datetime.utcnow().date()
+    due = {key for key, day in rates if day <= today}
+    if due:
+        apply_rates(due, today)
+
+# Apply rate periods that have come into force since the last run. Types whose
+# period is already applied are left alone, so per-room prices survive re-runs and
+# a missed run is caught up by the next; the price-rates service in
+# docker-compose.yml runs it hourly.
+@app.cli.command("apply-rates")
+@click.option("--date", "day", default=None, help="Day whose rates to apply (YYYY-MM-DD), default today.")
+def apply_rates_command(day):
+    day = datetime.strptime(day, "%Y-%m-%d").date() if day else datetime.utcnow().date()
+    keys = pending_rates(day)
+    if keys:
+        apply_rates(keys, day)
+        db.session.commit()
+    print(f"Applied rates for {len(keys)} room types on {day}")
+
+# Seed data, run once by bootstrap.py
+def seed_data():
     # Add price for room 103 if it doesn't exist
     existing_price = db.session.query(Price).filter_by(room_id="103").first()
     if not existing_price:
@@ -55,6 +222,14 @@ with app.app_context():
             db.session.rollback()
             print(f"Error creating price for room 103: {str(e)}")
 
+    # Backfill room_type_key for rows written before it existed, then build the summary
+    db.session.execute(
+        db.update(Price).where(Price.room_type_key.is_(None))
+        .values(room_type_key=db.func.lower(db.func.trim(Price.room_type)))
+    )
+    refresh_summary(db.session.scalars(db.select(Price.room_type_key).distinct()).all())
+    db.session.commit()
+
 #health check
 @app.route("/health")
 def health():
@@ -69,11 +244,109 @@ def get_all_prices():
 # Get prices by room type
 @app.route("/price/<room_type>", methods=["GET"])
 def get_price_by_room_type(room_type: str):
-    prices = Price.query.filter(func.lower(Price.room_type) == room_type.lower()).all()
+    prices = Price.query.filter(Price.room_type_key == room_type_key(room_type)).all()
     if not prices:
         return jsonify({"error": "Price not found"}), 404
     return jsonify([price.json() for price in prices])
 
+# Min, max and representative base price of a room type: one primary key read
+@app.route("/price/type/<room_type>/summary", methods=["GET"])
+def get_price_summary(room_type: str):
+    summary = db.session.get(PriceSummary, room_type_key(room_type))
+    if not summary:
+        return jsonify({"code": 404, "message": f"No prices found for room_type '{room_type}'"}), 404
+    return jsonify({"code": 200, "data": summary.json()}), 200
+
+def parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+# Base price of a room type on a day (?date=, default today): the rate in force,
+# or the current representative price if the type has no rate periods
+@app.route("/price/type/<room_type>/rate", methods=["GET"])
+def get_rate(room_type: str):
+    try:
+        day = parse_day(request.args["date"]) if request.args.get("date") else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"code": 400, "message": "Invalid date format. Use YYYY-MM-DD."}), 400
+
+    key = room_type_key(room_type)
+    rate = rate_in_force(key, day)
+    if rate:
+        return jsonify({"code": 200, "data": dict(rate.json(), date=str(day))}), 200
+    summary = db.session.get(PriceSummary, key)
+    if not summary:
+        return jsonify({"code": 404, "message": f"No prices found for room_type '{room_type}'"}), 404
+    return jsonify({"code": 200, "data": {
+        "room_type": summary.room_type, "effective_from": None, "price": summary.representative_price, "date": str(day)
+    }}), 200
+
+# Rates in force over [start, end): the period in force at start, then every
+# period that begins inside the range, each with the first day it applies
+@app.route("/price/type/<room_type>/rates", methods=["GET"])
+def get_rates(room_type: str):
+    try:
+        start = parse_day(request.args.get("start", ""))
+        end = parse_day(request.args.get("end", ""))
+    except ValueError:
+        return jsonify({"code": 400, "message": "start and end must be YYYY-MM-DD."}), 400
+    if end <= start:
+        return jsonify({"code": 400, "message": "end must be after start."}), 400
+
+    key = room_type_key(room_type)
+    first = rate_in_force(key, start)
+    later = db.session.scalars(
+        db.select(RatePeriod)
+        .filter(RatePeriod.room_type_key == key, RatePeriod.effective_from > start, RatePeriod.effective_from < end)
+        .order_by(RatePeriod.effective_from)
+    ).all()
+
+    periods = [dict(rate.json(), applies_from=str(rate.effective_from)) for rate in later]
+    if first:
+        periods.insert(0, dict(first.json(), applies_from=str(start)))
+    else:
+        # No rate scheduled yet at start: today's room prices apply until the first period
+        summary = db.session.get(PriceSummary, key)
+        if not summary:
+            return jsonify({"code": 404, "message": f"No prices found for room_type '{room_type}'"}), 404
+        periods.insert(0, {
+            "room_type": summary.room_type, "effective_from": None,
+            "price": summary.representative_price, "applies_from": str(start)
+        })
+    return jsonify({"code": 200, "data": {"room_type": room_type, "start": str(start), "end": str(end), "periods": periods}}), 200
+
+# Schedule rates for many room types at once:
+# {"rates": [{"room_type": ..., "price": ..., "effective_from": "YYYY-MM-DD" (default today)}, ...]}
+@app.route("/price/rates", methods=["POST"])
+def schedule_rates_bulk():
+    items = (request.get_json(silent=True) or {}).get("rates")
+    if not isinstance(items, list) or not items:
+        return jsonify({"code": 400, "message": "rates must be a non-empty list."}), 400
+
+    rates = {}
+    today = datetime.utcnow().date()
+    for item in items:
+        try:
+            room_type = item["room_type"]
+            price = float(item["price"])
+            day = parse_day(item["effective_from"]) if item.get("effective_from") else today
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"code": 400, "message": "Each rate needs room_type, a numeric price and an optional effective_from (YYYY-MM-DD)."}), 400
+        if price <= 0:
+            return jsonify({"code": 400, "message": "price must be positive."}), 400
+        rates[(room_type_key(room_type), day)] = (room_type, price)
+
+    try:
+        schedule_rates(rates)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("Error scheduling rates:", str(e))
+        return jsonify({"code": 500, "message": "Error scheduling rates."}), 500
+    return jsonify({"code": 200, "data": {"rates": [
+        {"room_type": room_type, "effective_from": str(day), "price": price}
+        for (_, day), (room_type, price) in rates.items()
+    ]}}), 200
+
 #create a price
 @app.route("/prices/<room_id>", methods=["PUT"])
 def update_or_create_price(room_id: str):
@@ -87,6 +360,7 @@ def update_or_create_price(room_id: str):
 
     if existing_price:
         existing_price.price = price
+        refresh_summary([existing_price.room_type_key])
         db.session.commit()
         return jsonify({
             "room_id": existing_price.room_id,
@@ -112,17 +386,22 @@ def update_or_create_price(room_id: str):
 def update_price(room_type: str):
     data = request.get_json()
     new_price_value = data.get('price')
+    key = room_type_key(room_type)
 
-    prices = Price.query.filter_by(room_type=room_type).all()
-    if not prices:
+    price = Price.query.filter_by(room_type_key=key).first()
+    if not price:
         return jsonify({"error": "Price not found"}), 404
-    
-    # Update price for all matching room_types
-    for price in prices:
-        price.price = new_price_value
-        
+    if not new_price_value:
+        return jsonify({"error": "Missing required field: 'price'"}), 400
+
+    # Record the rate; if it is already in force, one UPDATE reprices every room of the type
+    try:
+        effective_from = parse_day(data["effective_from"]) if data.get("effective_from") else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"error": "Invalid effective_from. Use YYYY-MM-DD."}), 400
+    schedule_rates({(key, effective_from): (price.room_type, new_price_value)})
     db.session.commit()
-    return jsonify({"room_type": price.room_type, "price": price.price})
+    return jsonify({"room_type": price.room_type, "price": new_price_value, "effective_from": str(effective_from)})
 
 # Update price by room_id
 @app.route("/price/<int:room_id>", methods=["PUT"])
@@ -139,6 +418,7 @@ def update_price_by_room_id(room_id: int):
     # Update the price for the given room_id
     price.price = new_price_value
 
+    refresh_summary([price.room_type_key])
     db.session.commit()
     return jsonify({"room_id": price.room_id, "room_type": price.room_type, "new_price": price.price})
 
@@ -1,14 +1,20 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
 from flask_sqlalchemy import SQLAlchemy
 from os import environ
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import namedtuple
+import bisect
+import threading
+import time
 
 app = Flask(__name__)
 
 CORS(app)
+instrumentation.instrument(app, "promotion", etag=True)
 
 # Database Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL")
@@ -18,6 +24,8 @@ db = SQLAlchemy(app)
 
 class Promotion(db.Model):
     __tablename__ = "promotion"
+    # Point lookups: room_type = ? AND promo_start <= ? AND promo_end >= ?
+    __table_args__ = (db.Index("ix_promotion_type_window", "room_type", "promo_start", "promo_end"),)
     
     promo_id = db.Column(db.Integer, primary_key=True)
     promo_name = db.Column(db.String(100), nullable=False)
@@ -38,6 +46,93 @@ class Promotion(db.Model):
             "room_type": self.room_type
         }
 
+# Schema version applied by bootstrap.py
+SCHEMA_VERSION = 2
+
+# Seconds before another worker's promotion writes show up in this worker's index
+PROMOTION_INDEX_TTL = float(environ.get("PROMOTION_INDEX_TTL", "30"))
+
+# Most (room_type, date) pairs one /promotion/quote request may expand to
+MAX_QUOTE_PAIRS = int(environ.get("MAX_QUOTE_PAIRS", "5000"))
+
+PromoWindow = namedtuple("PromoWindow", "promo_start promo_end promo_discount promo_id data")
+
+
+def promo_window(promotion):
+    return PromoWindow(promotion.promo_start, promotion.promo_end, promotion.promo_discount,
+                       promotion.promo_id, promotion.json())
+
+
+# When promotions overlap, the best discount wins; ties go to the later start, then the lowest promo_id
+def promotion_rank(promo):
+    return (promo.promo_discount, promo.promo_start, -promo.promo_id)
+
+
+class PromotionIndex:
+    """Current and future promotions (promo_end >= since) per room type, sorted by start,
+       with the running maximum end date. A lookup bisects to the last promotion starting
+       on or before the date and walks back only while an earlier one could still cover it.
+    """
+
+    def __init__(self, windows, since):
+        self.since = since
+        self.built_at = time.monotonic()
+        self._types = {}
+        for window in sorted(windows, key=lambda w: (w.promo_start, w.promo_id)):
+            starts, max_ends, entries = self._types.setdefault(window.data["room_type"].lower(), ([], [], []))
+            starts.append(window.promo_start)
+            max_ends.append(max(window.promo_end, max_ends[-1]) if max_ends else window.promo_end)
+            entries.append(window)
+
+    def covering(self, room_type, day):
+        starts, max_ends, entries = self._types.get(room_type.lower(), ([], [], []))
+        i = bisect.bisect_right(starts, day) - 1
+        while i >= 0 and max_ends[i] >= day:
+            if entries[i].promo_end >= day:
+                yield entries[i]
+            i -= 1
+
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def promotion_index():
+    global _index
+    today = datetime.utcnow().date()
+    with _index_lock:
+        if _index is None or _index.since != today or time.monotonic() - _index.built_at > PROMOTION_INDEX_TTL:
+            promotions = db.session.scalars(db.select(Promotion).filter(Promotion.promo_end >= today))
+            _index = PromotionIndex([promo_window(p) for p in promotions], today)
+        return _index
+
+
+# Writes in this worker rebuild the index on the next lookup (quotes are read-only POSTs)
+@app.after_request
+def invalidate_index(response):
+    global _index
+    if request.method in ("POST", "PUT", "DELETE") and request.endpoint != "quote_promotions" and response.status_code < 400:
+        with _index_lock:
+            _index = None
+    return response
+
+
+# The winning promotion for a room type on a day, or None. Past days (not in the
+# in-process index) go to the database through ix_promotion_type_window.
+def applicable_promotion(room_type, day):
+    index = promotion_index()
+    if day >= index.since:
+        candidates = index.covering(room_type, day)
+    else:
+        candidates = [promo_window(p) for p in db.session.scalars(
+            db.select(Promotion).filter(
+                Promotion.room_type == room_type,
+                Promotion.promo_start <= day,
+                Promotion.promo_end >= day
+            )
+        )]
+    return max(candidates, key=promotion_rank, default=None)
+
 # Create a new promotion
 @app.route("/promotion", methods=["POST"])
 def add_promotion():
@@ -131,7 +226,7 @@ def update_promotion(promo_id):
 # Get applicable promotion
 @app.route("/promotion/applicable", methods=["GET"])
 def get_applicable_promotion():
-    room_type = request.args.get("room_type", "").lower()
+    room_type = request.args.get("room_type", "")
     date = request.args.get("date")
 
     try:
@@ -139,16 +234,69 @@ def get_applicable_promotion():
     except:
         return jsonify({"code": 400, "message": "Invalid date format. Use YYYY-MM-DD."}), 400
 
-    promotions = Promotion.query.all()
-    for promo in promotions:
-        if (
-            promo.room_type.lower() in [room_type, "all"]
-            and promo.promo_start <= date_obj <= promo.promo_end
-        ):
-            return jsonify({"code": 200, "data": promo.json()}), 200
+    promo = applicable_promotion(room_type, date_obj)
+    if promo:
+        return jsonify({"code": 200, "data": promo.data}), 200
 
     return jsonify({"code": 404, "message": "No applicable promotion found."}), 404
 
+def parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+
+# Expand a quote request body into (room_type, date) pairs, or raise ValueError
+def quote_pairs(data):
+    pairs = []
+    for item in data.get("pairs") or []:
+        pairs.append((item["room_type"], parse_day(item["date"])))
+    for item in data.get("ranges") or []:
+        start = parse_day(item["start"])
+        end = parse_day(item["end"])
+        if end < start:
+            raise ValueError("Range end must not be before its start.")
+        if len(pairs) + (end - start).days + 1 > MAX_QUOTE_PAIRS:
+            raise ValueError(f"At most {MAX_QUOTE_PAIRS} pairs per quote.")
+        pairs.extend((item["room_type"], start + timedelta(days=i)) for i in range((end - start).days + 1))
+    if len(pairs) > MAX_QUOTE_PAIRS:
+        raise ValueError(f"At most {MAX_QUOTE_PAIRS} pairs per quote.")
+    return pairs
+
+# Winning promotion for many (room_type, date) pairs at once.
+# Body: {"pairs": [{"room_type", "date"}], "ranges": [{"room_type", "start", "end"}]} (inclusive end).
+# Future-only quotes come from the in-process index; otherwise one query covers every pair.
+@app.route("/promotion/quote", methods=["POST"])
+def quote_promotions():
+    data = request.get_json(silent=True) or {}
+    try:
+        pairs = quote_pairs(data)
+    except (KeyError, TypeError, AttributeError):
+        return jsonify({"code": 400, "message": "Each pair needs room_type and date; each range room_type, start and end."}), 400
+    except ValueError as e:
+        return jsonify({"code": 400, "message": str(e)}), 400
+    if not pairs:
+        return jsonify({"code": 400, "message": "Provide pairs or ranges."}), 400
+
+    first = min(day for _, day in pairs)
+    index = promotion_index()
+    if first < index.since:
+        last = max(day for _, day in pairs)
+        promotions = db.session.scalars(
+            db.select(Promotion).filter(
+                Promotion.room_type.in_({room_type for room_type, _ in pairs}),
+                Promotion.promo_start <= last,
+                Promotion.promo_end >= first
+            )
+        )
+        index = PromotionIndex([promo_window(p) for p in promotions], first)
+
+    quotes = []
+    for room_type, day in pairs:
+        promo = max(index.covering(room_type, day), key=promotion_rank, default=None)
+        quotes.append({"room_type": room_type, "date": str(day), "promotion": promo.data if promo else None})
+    return jsonify({"code": 200, "data": {"quotes": quotes}}), 200
+
 # Delete a promotion by ID
 @app.route("/promotion/<int:promo_id>", methods=["DELETE"])
 def delete_promotion(promo_id):
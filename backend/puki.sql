@@ -7,7 +7,8 @@ CREATE TABLE IF NOT EXISTS guest (
   guest_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
   name VARCHAR(64) NOT NULL,
   email VARCHAR(128) UNIQUE NOT NULL,
-  contact VARCHAR(15) UNIQUE NOT NULL
+  contact VARCHAR(15) UNIQUE NOT NULL,
+  INDEX ix_guest_name (name)
 );
 
 -- Room table
@@ -16,7 +17,9 @@ CREATE TABLE IF NOT EXISTS room (
     room_type ENUM('Single', 'Family', 'PresidentialSuite') NOT NULL,
     key_pin INT,
     floor INT NOT NULL,
-    availability ENUM('VACANT', 'OCCUPIED', 'CLEANING') DEFAULT 'VACANT'
+    availability ENUM('VACANT', 'OCCUPIED', 'CLEANING') DEFAULT 'VACANT',
+    INDEX ix_room_type_availability (room_type, availability, floor, room_id),
+    INDEX ix_room_type_availability_id (room_type, availability, room_id)
 );
 
 -- Booking table
@@ -29,10 +32,22 @@ CREATE TABLE IF NOT EXISTS booking (
     check_out DATE NOT NULL,
     room_type ENUM('Single', 'Family', 'PresidentialSuite') NOT NULL,  
     price DECIMAL(10, 2) NOT NULL,
+    INDEX ix_booking_room_stay (room_id, check_in, check_out),
+    INDEX ix_booking_type_stay (room_type, check_in, check_out),
+    INDEX ix_booking_guest (guest_id, check_in),
     FOREIGN KEY (guest_id) REFERENCES guest(guest_id) ON DELETE CASCADE,
     FOREIGN KEY (room_id) REFERENCES room(room_id) ON DELETE SET NULL
 );
 
+-- Inventory ledger: rooms sellable vs. booked per room type per night
+CREATE TABLE IF NOT EXISTS room_inventory (
+    room_type VARCHAR(36) NOT NULL,
+    stay_date DATE NOT NULL,
+    capacity INT NOT NULL,
+    booked INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (room_type, stay_date)
+);
+
 -- Create the 'keycard' table
 CREATE TABLE IF NOT EXISTS keycard (
     keycard_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -71,7 +86,36 @@ CREATE TABLE IF NOT EXISTS price (
     room_id VARCHAR(5) PRIMARY KEY NOT NULL,
     floor INT NOT NULL,
     room_type ENUM('Single', 'Family', 'PresidentialSuite') NOT NULL,
-    price DECIMAL(10, 2) NOT NULL
+    room_type_key VARCHAR(50),
+    price DECIMAL(10, 2) NOT NULL,
+    INDEX ix_price_room_type_key (room_type_key)
+);
+
+-- Min/max/representative price per room type, maintained by the price service
+-- (rebuilt from the price table by bootstrap.py)
+CREATE TABLE IF NOT EXISTS price_summary (
+    room_type_key VARCHAR(50) PRIMARY KEY NOT NULL,
+    room_type VARCHAR(50) NOT NULL,
+    rooms INT NOT NULL,
+    min_price DOUBLE NOT NULL,
+    max_price DOUBLE NOT NULL,
+    representative_price DOUBLE NOT NULL
+);
+
+-- Effective-dated rate per room type; the rate in force on a day is the latest
+-- effective_from on or before it
+CREATE TABLE IF NOT EXISTS rate_period (
+    room_type_key VARCHAR(50) NOT NULL,
+    effective_from DATE NOT NULL,
+    room_type VARCHAR(50) NOT NULL,
+    price DOUBLE NOT NULL,
+    PRIMARY KEY (room_type_key, effective_from)
+);
+
+-- The rate period last applied to each type's rooms (see price.py apply-rates)
+CREATE TABLE IF NOT EXISTS rate_applied (
+    room_type_key VARCHAR(50) PRIMARY KEY NOT NULL,
+    effective_from DATE NOT NULL
 );
 
 -- Insert data into guest
@@ -152,4 +196,18 @@ INSERT INTO price (room_id, floor, room_type, price) VALUES
 ('301', 3, 'Single', 100.00),
 ('302', 3, 'Family', 200.00),
 ('401', 4, 'PresidentialSuite', 500.00),
-('402', 4, 'Single', 100.00);
\ No newline at end of file
+('402', 4, 'Single', 100.00);
+
+UPDATE price SET room_type_key = LOWER(TRIM(room_type));
+
+-- Summary rows for the seeded prices (what the price service's refresh_summary
+-- computes): the representative price is the most common one, lowest on a tie
+INSERT INTO price_summary (room_type_key, room_type, rooms, min_price, max_price, representative_price)
+SELECT p.room_type_key, MIN(p.room_type), COUNT(*), MIN(p.price), MAX(p.price),
+    (SELECT m.price FROM price m
+     WHERE m.room_type_key = p.room_type_key
+     GROUP BY m.price
+     ORDER BY COUNT(*) DESC, m.price
+     LIMIT 1)
+FROM price p
+GROUP BY p.room_type_key;
\ No newline at end of file
@@ -1,12 +1,17 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
+import listing
 from flask_sqlalchemy import SQLAlchemy
 from os import environ
 import requests
+import threading
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "room")
 
 # Database Configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = environ.get("DATABASE_URL")
@@ -15,6 +20,11 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 db = SQLAlchemy(app)
 class Room(db.Model):
     __tablename__ = "room"
+    # Claims read vacant rooms in room_id order, with or without a floor, straight off these
+    __table_args__ = (
+        db.Index("ix_room_type_availability", "room_type", "availability", "floor", "room_id"),
+        db.Index("ix_room_type_availability_id", "room_type", "availability", "room_id"),
+    )
 
     room_id = db.Column(db.String(36), primary_key=True)
     room_type = db.Column(db.Enum("Single", "Family", "PresidentialSuite"), nullable=False)
@@ -30,9 +40,22 @@ class Room(db.Model):
             "floor": self.floor,
             "availability": self.availability
         }
-    
-with app.app_context():
-    db.create_all()
+
+# Schema version applied by bootstrap.py
+SCHEMA_VERSION = 3
+
+# Short-lived cache for /room/summary, which dashboards poll every few seconds
+SUMMARY_TTL = float(environ.get("ROOM_SUMMARY_TTL", "2"))
+_summary_lock = threading.Lock()
+_summary_cache = {"expires_at": 0.0, "data": None}
+
+# Any successful write in this process makes the cached summary stale
+@app.after_request
+def invalidate_summary(response):
+    if request.method != "GET" and request.endpoint != "get_rooms_batch" and response.status_code < 400:
+        with _summary_lock:
+            _summary_cache["expires_at"] = 0.0
+    return response
 
 # health check
 @app.route("/health")
@@ -70,6 +93,11 @@ def create_room():
         print("Error creating room:", str(e))
         return jsonify({"code": 500, "message": "Error creating room."}), 500
 
+# get many rooms by ID with one IN query: {"ids": [...]}
+@app.route("/room/batch", methods=["POST"])
+def get_rooms_batch():
+    return listing.respond_batch(db.session, Room, ("room_id", str), "rooms", normalize=lambda room_id: room_id.zfill(3))
+
 # get room by ID
 @app.route("/room/<string:room_id>", methods=["GET"])
 def get_room(room_id):
@@ -106,6 +134,42 @@ def get_rooms_by_type(room_type):
 
     return jsonify({"code": 200, "data": {"rooms": [room.json() for room in rooms]}}), 200
 
+# Room counts by type x floor x availability, computed with GROUP BY
+@app.route("/room/summary", methods=["GET"])
+def get_room_summary():
+    with _summary_lock:
+        if _summary_cache["expires_at"] > time.monotonic():
+            return jsonify({"code": 200, "data": _summary_cache["data"]}), 200
+
+    rows = db.session.execute(
+        db.select(Room.room_type, Room.floor, Room.availability, db.func.count())
+        .group_by(Room.room_type, Room.floor, Room.availability)
+        .order_by(Room.room_type, Room.floor, Room.availability)
+    ).all()
+
+    by_availability = {}
+    by_type = {}
+    for room_type, floor, availability, count in rows:
+        by_availability[availability] = by_availability.get(availability, 0) + count
+        type_counts = by_type.setdefault(room_type, {"total": 0})
+        type_counts["total"] += count
+        type_counts[availability] = type_counts.get(availability, 0) + count
+
+    summary = {
+        "total": sum(by_availability.values()),
+        "by_availability": by_availability,
+        "by_type": by_type,
+        "rows": [
+            {"room_type": room_type, "floor": floor, "availability": availability, "count": count}
+            for room_type, floor, availability, count in rows
+        ],
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds")
+    }
+    with _summary_lock:
+        _summary_cache["data"] = summary
+        _summary_cache["expires_at"] = time.monotonic() + SUMMARY_TTL
+    return jsonify({"code": 200, "data": summary}), 200
+
 # Get all rooms
 @app.route("/room", methods=["GET"])
 def get_all_rooms():
@@ -117,6 +181,54 @@ def get_all_rooms():
         }
     }), 200
 
+ROOM_STATUSES = ["VACANT", "OCCUPIED", "CLEANING"]
+
+# Set the status of many rooms with a single UPDATE; returns the number of rows changed
+def set_status(room_ids, status):
+    if not room_ids:
+        return 0
+    result = db.session.execute(
+        db.update(Room)
+        .where(Room.room_id.in_(room_ids))
+        .values(availability=status)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+# Bulk status change, either for a list of rooms:
+#   {"room_ids": ["101", "102"], "status": "VACANT"}
+# or for the first N rooms of a type (optionally only those currently in from_status):
+#   {"room_type": "Single", "count": 5, "status": "VACANT", "from_status": "CLEANING"}
+@app.route("/room/bulk-status", methods=["PUT"])
+def bulk_update_room_status():
+    data = request.get_json() or {}
+    status = data.get("status")
+
+    if status not in ROOM_STATUSES:
+        return jsonify({"code": 400, "message": f"Status must be one of {ROOM_STATUSES}."}), 400
+
+    try:
+        if "room_ids" in data:
+            room_ids = [str(room_id) for room_id in data["room_ids"]]
+        elif "room_type" in data and "count" in data:
+            query = db.select(Room.room_id).filter_by(room_type=data["room_type"])
+            if data.get("from_status"):
+                query = query.filter_by(availability=data["from_status"])
+            room_ids = list(db.session.scalars(query.order_by(Room.room_id).limit(int(data["count"]))))
+        else:
+            return jsonify({"code": 400, "message": "Provide room_ids, or room_type and count."}), 400
+
+        updated = set_status(room_ids, status)
+        db.session.commit()
+        return jsonify({
+            "code": 200,
+            "message": "Room statuses updated successfully.",
+            "data": {"status": status, "matched": len(room_ids), "updated": updated, "room_ids": room_ids}
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"code": 500, "message": f"Error updating room statuses: {str(e)}"}), 500
+
 # Update room availability
 @app.route("/room/available", methods=["POST"])
 def update_room_availability():
@@ -130,32 +242,29 @@ def update_room_availability():
     availability = data["availability"]
     
     try:
-        # Get all rooms by type
-        single_rooms = db.session.scalars(db.select(Room).filter_by(room_type="Single")).all()
-        double_rooms = db.session.scalars(db.select(Room).filter_by(room_type="Family")).all()
-        family_rooms = db.session.scalars(db.select(Room).filter_by(room_type="PresidentialSuite")).all()
-
-        # Update Single rooms
-        for i, room in enumerate(single_rooms):
-            if i < availability["single"]:
-                room.availability = "VACANT"
-            else:
-                room.availability = "OCCUPIED"
-        
-        # Update Double rooms
-        for i, room in enumerate(double_rooms):
-            if i < availability["double"]:
-                room.availability = "VACANT"
-            else:
-                room.availability = "OCCUPIED"
-                
-        # Update Family rooms
-        for i, room in enumerate(family_rooms):
-            if i < availability["family"]:
-                room.availability = "VACANT"
+        # First N rooms of each type become VACANT, the rest OCCUPIED:
+        # one query for the ids, then one UPDATE per status
+        limits = {
+            "Single": availability["single"],
+            "Family": availability["double"],
+            "PresidentialSuite": availability["family"]
+        }
+        rooms = db.session.execute(
+            db.select(Room.room_id, Room.room_type).order_by(Room.room_type, Room.room_id)
+        ).all()
+
+        position = {}
+        vacant_ids, occupied_ids = [], []
+        for room_id, room_type in rooms:
+            position[room_type] = position.get(room_type, 0) + 1
+            if position[room_type] <= limits.get(room_type, 0):
+                vacant_ids.append(room_id)
             else:
-                room.availability = "OCCUPIED"
-        
+                occupied_ids.append(room_id)
+
+        set_status(vacant_ids, "VACANT")
+        set_status(occupied_ids, "OCCUPIED")
+
         # Commit the changes to the database
         db.session.commit()
         
@@ -196,6 +305,42 @@ def update_room_status(room_id):
         db.session.rollback()
         return jsonify({"code": 500, "message": f"Error updating room status: {str(e)}"}), 500
 
+# Claim a vacant room of a type: select and mark it OCCUPIED in one transaction.
+# SKIP LOCKED lets concurrent claimers each take a different room without queueing.
+# Each query walks an index in room_id order and locks only the row it returns;
+# a sorted scan would lock every vacant room of the type and starve other claimers.
+@app.route("/room/claim", methods=["POST"])
+def claim_room():
+    data = request.get_json() or {}
+    room_type = data.get("room_type")
+    preferred_floor = data.get("floor")
+
+    if room_type not in ["Single", "Family", "PresidentialSuite"]:
+        return jsonify({"code": 400, "message": "Invalid room type."}), 400
+
+    query = db.select(Room).filter_by(room_type=room_type, availability="VACANT").order_by(Room.room_id)
+
+    try:
+        room = None
+        # Preferred floor first, then any floor
+        if preferred_floor is not None:
+            room = db.session.scalar(
+                query.filter_by(floor=preferred_floor).limit(1).with_for_update(skip_locked=True)
+            )
+        if not room:
+            room = db.session.scalar(query.limit(1).with_for_update(skip_locked=True))
+        if not room:
+            db.session.rollback()
+            return jsonify({"code": 404, "message": f"No vacant rooms of type '{room_type}'."}), 404
+
+        room.availability = "OCCUPIED"
+        db.session.commit()
+        return jsonify({"code": 200, "message": "Room claimed.", "data": room.json()}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error claiming room: {e}")
+        return jsonify({"code": 500, "message": "Server error."}), 500
+
 #CALLED BY CHECKIN SERVICE DO NOT TOUCH 
 @app.route("/room/next-available/<string:room_type>", methods=["GET"])
 def get_next_available_room(room_type):
@@ -1,11 +1,14 @@
 from datetime import datetime, date
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import instrumentation
+import listing
 from flask_sqlalchemy import SQLAlchemy
 from os import environ 
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.instrument(app, "roster")
 
 app.config['SQLALCHEMY_DATABASE_URI'] = environ.get("DATABASE_URL")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -23,24 +26,29 @@ class Roster(db.Model):
 
     def json(self):
         return {
-            "date": self.date,
+            "date": str(self.date),
             "room_id": self.room_id,
             "floor": self.floor,
             "housekeeper_id": self.housekeeper_id,
             "completed": self.completed
         }
-    
-with app.app_context():
-    db.create_all()
+
+# Schema version applied by bootstrap.py
+SCHEMA_VERSION = 1
 
 # Health check
 @app.route("/health")
 def health():
     return {"status": "healthy"}
 
-# Get all roster entries
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+# Get all roster entries (?after=<date>,<room_id>&limit=&fields=&format=ndjson, see listing.py)
 @app.route("/roster", methods=["GET"])
 def get_all_roster():
+    if listing.requested():
+        return listing.respond(db.session, Roster, [("date", parse_date), ("room_id", str)], "roster")
     roster_list = Roster.query.all()
     if roster_list:
         return jsonify({"code": 200, "data": [r.json() for r in roster_list]}), 200
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Production launcher shared by all Puki services.
+
+    python serve.py booking 5002
+
+Imports <service>.app and serves it with gunicorn using several worker
+processes, each with a pool of threads. Every setting can be set for all
+services (WEB_WORKERS=4) or for one service, which wins (BOOKING_WEB_WORKERS=8):
+
+    WEB_WORKERS            worker processes (default: 2 x CPUs + 1, at most 8)
+    WEB_THREADS            threads per worker (default: 4)
+    WEB_TIMEOUT            seconds before a silent worker is killed (default: 30)
+    WEB_GRACEFUL_TIMEOUT   seconds workers get to finish on SIGTERM (default: 30)
+    WEB_KEEPALIVE          seconds to hold idle keep-alive connections (default: 5)
+    WEB_PRELOAD            import the app once in the master before forking (default: false)
+    WEB_MAX_REQUESTS       recycle a worker after this many requests, 0 = never (default: 0)
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+
+
+def setting(service, name, default):
+    return os.environ.get(f"{service.upper()}_{name}", os.environ.get(name, default))
+
+
+def build_options(service, port):
+    workers = int(setting(service, "WEB_WORKERS", min(2 * multiprocessing.cpu_count() + 1, 8)))
+    max_requests = int(setting(service, "WEB_MAX_REQUESTS", 0))
+    return {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        "worker_class": "gthread",
+        "threads": int(setting(service, "WEB_THREADS", 4)),
+        "timeout": int(setting(service, "WEB_TIMEOUT", 30)),
+        "graceful_timeout": int(setting(service, "WEB_GRACEFUL_TIMEOUT", 30)),
+        "keepalive": int(setting(service, "WEB_KEEPALIVE", 5)),
+        "preload_app": setting(service, "WEB_PRELOAD", "false").lower() == "true",
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests // 10,
+        "accesslog": "-",
+        "errorlog": "-",
+        "when_ready": when_ready,
+        "child_exit": child_exit,
+        "worker_exit": worker_exit
+    }
+
+
+def when_ready(server):
+    # Workers write metrics, invokes counters included, to PROMETHEUS_MULTIPROC_DIR;
+    # the master serves the aggregate on METRICS_PORT so prometheus.yml sees one
+    # target per service
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        port = int(os.environ.get("METRICS_PORT", "8000"))
+        try:
+            start_http_server(port, registry=registry)
+        except OSError as e:
+            server.log.warning(f"metrics port {port} unavailable: {e}")
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    invokes = sys.modules.get("invokes")
+    if invokes is not None:
+        invokes.close_pools()
+
+
+class ServiceApplication(BaseApplication):
+    def __init__(self, target, options):
+        self.target = target
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return import_app(self.target)
+
+
+def main(argv):
+    if len(argv) != 3:
+        print("usage: python serve.py <service> <port>")
+        return 2
+    service, port = argv[1], argv[2]
+    options = build_options(service, port)
+
+    # Must be set before prometheus_client is imported anywhere
+    if options["workers"] > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix=f"{service}-metrics-")
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        os.environ["METRICS_SERVER"] = "false"
+
+    ServiceApplication(f"{service}:app", options).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
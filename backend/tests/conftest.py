@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Services are flat modules in backend/, imported by name as in the Dockerfiles
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("METRICS_SERVER", "false")
+# Services read DATABASE_URL at import; tests that need SQL run on in-memory SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import booking
+from booking import (Booking, InventoryError, RoomInventory, db, find_conflict, reserve_inventory,
+                     reserve_nights)
+
+
+@pytest.fixture
+def session():
+    with booking.app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+def add_booking(session, room_id, check_in, check_out, room_type="Single"):
+    b = Booking(guest_id=1, room_id=room_id, floor=1, check_in=check_in, check_out=check_out,
+                room_type=room_type, price=100.0)
+    session.add(b)
+    session.commit()
+    return b.booking_id
+
+
+@pytest.mark.parametrize("check_in, check_out, conflicts", [
+    (date(2025, 1, 5), date(2025, 1, 10), False),   # ends the day the stay begins
+    (date(2025, 1, 15), date(2025, 1, 20), False),  # begins the day the stay ends
+    (date(2025, 1, 14), date(2025, 1, 16), True),   # overlaps the last night
+    (date(2025, 1, 9), date(2025, 1, 11), True),    # overlaps the first night
+    (date(2025, 1, 11), date(2025, 1, 12), True),   # inside the stay
+    (date(2025, 1, 5), date(2025, 1, 20), True),    # covers the stay
+    (date(2025, 1, 10), date(2025, 1, 15), True),   # same dates
+])
+def test_find_conflict_boundaries(session, check_in, check_out, conflicts):
+    existing = add_booking(session, "101", date(2025, 1, 10), date(2025, 1, 15))
+    assert find_conflict("101", check_in, check_out) == (existing if conflicts else None)
+
+
+def test_find_conflict_is_room_scoped(session):
+    add_booking(session, "101", date(2025, 1, 10), date(2025, 1, 15))
+    add_booking(session, None, date(2025, 1, 10), date(2025, 1, 15))
+    assert find_conflict("102", date(2025, 1, 10), date(2025, 1, 15)) is None
+
+
+def test_find_conflict_excludes_booking_being_updated(session):
+    own = add_booking(session, "101", date(2025, 1, 10), date(2025, 1, 15))
+    assert find_conflict("101", date(2025, 1, 12), date(2025, 1, 18), exclude_booking_id=own) is None
+
+    other = add_booking(session, "101", date(2025, 1, 17), date(2025, 1, 19))
+    assert find_conflict("101", date(2025, 1, 12), date(2025, 1, 18), exclude_booking_id=own) == other
+
+
+def test_reserve_inventory_uses_current_capacity(session):
+    # Ledger rows written when the type had one room
+    reserve_inventory("Single", date(2025, 1, 10), date(2025, 1, 12), capacity=1)
+    session.commit()
+    with pytest.raises(InventoryError):
+        reserve_inventory("Single", date(2025, 1, 10), date(2025, 1, 12), capacity=1)
+    session.rollback()
+
+    # A second room is added: the next reservation sees it and refreshes the rows
+    reserve_inventory("Single", date(2025, 1, 10), date(2025, 1, 12), capacity=2)
+    session.commit()
+    rows = session.scalars(db.select(RoomInventory).order_by(RoomInventory.stay_date)).all()
+    assert [(row.capacity, row.booked) for row in rows] == [(2, 2), (2, 2)]
+
+
+def test_reserve_nights_mixed_counts_and_gaps(session):
+    nights = {date(2025, 1, 10): 2, date(2025, 1, 11): 2, date(2025, 1, 12): 1, date(2025, 1, 14): 2}
+    reserve_nights("Family", nights, capacity=2)
+    session.commit()
+    rows = session.scalars(db.select(RoomInventory).order_by(RoomInventory.stay_date)).all()
+    assert {row.stay_date: row.booked for row in rows} == nights
+
+    # The 12th has one room left; asking for two anywhere in the run fails
+    with pytest.raises(InventoryError):
+        reserve_nights("Family", {date(2025, 1, 12): 2, date(2025, 1, 13): 2}, capacity=2)
+
+
+@pytest.mark.parametrize("reply, code", [
+    ({"code": 400, "message": "Invalid room type."}, 400),
+    ({"code": 500, "message": "Server error."}, 503),
+    ({"code": 503, "message": "Service unavailable."}, 503),
+])
+def test_create_booking_maps_room_service_errors(session, monkeypatch, reply, code):
+    monkeypatch.setattr(booking.invokes, "invoke_http", lambda *args, **kwargs: reply)
+    response = booking.app.test_client().post("/booking", json={
+        "guest_id": 1, "room_type": "Penthouse", "check_in": "2025-01-10", "check_out": "2025-01-12", "price": 100
+    })
+    assert response.status_code == code
+    assert session.scalar(db.select(db.func.count()).select_from(Booking)) == 0
+
+
+def test_seed_data_fills_ledger_from_future_bookings(session):
+    today = datetime.utcnow().date()
+    add_booking(session, "101", today - timedelta(days=1), today + timedelta(days=2))
+    add_booking(session, None, today + timedelta(days=1), today + timedelta(days=2))
+    add_booking(session, "102", today - timedelta(days=5), today - timedelta(days=2))
+
+    booking.seed_data()
+
+    rows = session.scalars(db.select(RoomInventory).order_by(RoomInventory.stay_date)).all()
+    assert [(row.room_type, row.stay_date, row.booked) for row in rows] == [
+        ("Single", today, 1), ("Single", today + timedelta(days=1), 2)
+    ]
+
+
+def test_update_booking_moves_only_the_changed_nights(session, monkeypatch):
+    monkeypatch.setattr(booking, "room_capacity", lambda room_type: 1)
+    client = booking.app.test_client()
+    booking_id = client.post("/booking", json={
+        "guest_id": 1, "room_type": "Single", "check_in": "2025-01-10", "check_out": "2025-01-13", "price": 100
+    }).get_json()["data"]["booking_id"]
+
+    # Earlier by five days: the old nights are handed back, the new ones taken
+    response = client.put(f"/booking/{booking_id}", json={"check_in": "2025-01-08", "check_out": "2025-01-11"})
+    assert response.status_code == 200
+    rows = session.scalars(db.select(RoomInventory).order_by(RoomInventory.stay_date)).all()
+    assert {str(row.stay_date): row.booked for row in rows} == {
+        "2025-01-08": 1, "2025-01-09": 1, "2025-01-10": 1, "2025-01-11": 0, "2025-01-12": 0
+    }
+
+    # A night another booking holds can't be taken; nothing changes
+    client.post("/booking", json={
+        "guest_id": 2, "room_type": "Single", "check_in": "2025-01-11", "check_out": "2025-01-12", "price": 100
+    })
+    response = client.put(f"/booking/{booking_id}", json={"check_in": "2025-01-09", "check_out": "2025-01-12"})
+    assert response.status_code == 400
+    session.expire_all()
+    assert session.get(RoomInventory, ("Single", date(2025, 1, 8))).booked == 1
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+import checkin
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    state = {"guest": {"code": 200, "data": {"guest_id": 1, "name": "Jack Lee"}},
+             "assign": {"code": 200, "data": {}}}
+
+    def invoke_http(url, method="GET", json=None, **kwargs):
+        calls.append((method, url.split("/", 3)[-1], json))
+        if "/booking/1/assign-room" in url:
+            return state["assign"]
+        if "/booking/1" in url:
+            return {"code": 200, "data": {"guest_id": 1, "room_type": "Single",
+                                          "check_in": str(datetime.utcnow().date())}}
+        if "/update-status" in url or "/keycard" in url:
+            return {"code": 200, "data": {}}
+        raise AssertionError(url)
+
+    def invoke_many(batch):
+        calls.append(("MANY", [call["url"].split("/", 3)[-1] for call in batch], None))
+        return [state["guest"], {"code": 200, "data": {"room_id": "202", "floor": 2}}]
+
+    monkeypatch.setattr(checkin.invokes, "invoke_http", invoke_http)
+    monkeypatch.setattr(checkin.invokes, "invoke_many", invoke_many)
+    state["calls"] = calls
+    return state
+
+
+def released(calls):
+    return [url for method, url, body in calls if method == "PUT" and url.endswith("update-status")]
+
+
+def test_guest_lookup_and_claim_run_together(upstream):
+    response = checkin.app.test_client().post("/checkin", json={"booking_id": 1, "name": "jack lee"})
+    assert response.status_code == 200
+    assert ("MANY", ["guest/1", "room/claim"], None) in upstream["calls"]
+    assert released(upstream["calls"]) == []
+
+
+def test_guest_mismatch_releases_the_claimed_room(upstream):
+    response = checkin.app.test_client().post("/checkin", json={"booking_id": 1, "name": "Someone Else"})
+    assert response.status_code == 400
+    assert released(upstream["calls"]) == ["room/202/update-status"]
+
+
+def test_failed_assignment_releases_the_claimed_room(upstream):
+    upstream["assign"] = {"code": 500, "message": "Server error."}
+    response = checkin.app.test_client().post("/checkin", json={"booking_id": 1, "name": "Jack Lee"})
+    assert response.status_code == 500
+    assert released(upstream["calls"]) == ["room/202/update-status"]
@@ -0,0 +1,41 @@
+import dynamicprice
+
+PROMO = {"promo_id": 7, "promo_discount": 20.0, "room_type": "Single",
+         "promo_start": "2025-01-01", "promo_end": "2025-01-31"}
+
+
+def fake_invoke_http(url, method="GET", **kwargs):
+    if "/rate?" in url:
+        return {"code": 200, "data": {"room_type": "Single", "effective_from": None, "price": 100.0}}
+    if "/promotion/applicable" in url:
+        return {"code": 200, "data": PROMO}
+    raise AssertionError(url)
+
+
+def fake_invoke_many(calls):
+    replies = []
+    for call in calls:
+        if "/rates?" in call["url"]:
+            replies.append({"code": 200, "data": {"periods": [
+                {"room_type": "Single", "effective_from": None, "price": 100.0, "applies_from": "2025-01-10"}
+            ]}})
+        else:
+            nights = call["json"]["ranges"][0]
+            replies.append({"code": 200, "data": {"quotes": [
+                {"room_type": nights["room_type"], "date": day, "promotion": PROMO} for day in ("2025-01-10", "2025-01-11")
+            ]}})
+    return replies
+
+
+def test_single_night_and_calendar_prices_agree(monkeypatch):
+    monkeypatch.setattr(dynamicprice.invokes, "invoke_http", fake_invoke_http)
+    monkeypatch.setattr(dynamicprice.invokes, "invoke_many", fake_invoke_many)
+    client = dynamicprice.app.test_client()
+
+    single = client.get("/dynamicprice?room_type=Single&date=2025-01-10").get_json()["data"]
+    calendar = client.get("/dynamicprice/calendar?room_type=Single&start=2025-01-10&end=2025-01-12").get_json()["data"]
+
+    assert (single["discount_applied"], single["final_price"]) == (20.0, 80.0)
+    night = calendar["nights"][0]
+    assert (night["discount_applied"], night["final_price"]) == (20.0, 80.0)
+    assert calendar["total_price"] == 160.0
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+from flask import Flask
+
+import instrumentation
+import tracing
+
+
+def make_app(**options):
+    app = Flask(__name__)
+    instrumentation.instrument(app, "test", **options)
+
+    @app.route("/thing")
+    def thing():
+        return {"code": 200, "data": "x"}
+
+    return app
+
+
+def test_etag_option_answers_304_for_current_copy():
+    client = make_app(etag=True).test_client()
+    first = client.get("/thing")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get("/thing", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_no_etag_by_default():
+    response = make_app().test_client().get("/thing")
+    assert "ETag" not in response.headers
+
+
+def make_composite_app():
+    app = make_app(span_header=True)
+
+    @app.route("/composite")
+    def composite():
+        tracing.record_span("booking", "GET", "/booking/1", tracing.current().started, 200)
+        return {"code": 200, "data": tracing.outgoing_headers()}
+
+    return app
+
+
+def test_span_header_only_when_asked(monkeypatch):
+    client = make_composite_app().test_client()
+    plain = client.get("/composite")
+    assert tracing.SPANS_HEADER not in plain.headers
+    assert tracing.TRACE_HEADER in plain.headers
+    assert tracing.DEBUG_HEADER not in plain.get_json()["data"]
+
+    asked = client.get("/composite", headers={tracing.DEBUG_HEADER: "1"})
+    assert asked.headers[tracing.SPANS_HEADER].startswith("test ")
+    assert "booking GET /booking/1 200" in asked.headers[tracing.SPANS_HEADER]
+    # Downstream calls carry the flag so nested summaries come back too
+    assert asked.get_json()["data"][tracing.DEBUG_HEADER] == "1"
+
+    monkeypatch.setattr(instrumentation, "TRACE_SPANS", True)
+    assert tracing.SPANS_HEADER in client.get("/composite").headers
+
+
+# PROMETHEUS_MULTIPROC_DIR must be set before prometheus_client is imported, so
+# each worker runs in a fresh interpreter
+WORKER = """
+import sys
+from flask import Flask
+import instrumentation, invokes
+app = Flask(__name__)
+instrumentation.instrument(app, "test")
+with invokes._stats_lock:
+    invokes._pool_stats["requests"] += int(sys.argv[1])
+instrumentation._invokes_exporter.sync()
+"""
+
+
+def test_invokes_counters_reach_the_multiprocess_scrape(tmp_path):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), METRICS_SERVER="false", PYTHONPATH=backend)
+    for requests in (3, 4):
+        subprocess.run([sys.executable, "-c", WORKER, str(requests)], env=env, check=True)
+
+    scrape = subprocess.run([sys.executable, "-c", """
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+registry = CollectorRegistry()
+multiprocess.MultiProcessCollector(registry)
+print(generate_latest(registry).decode())
+"""], env=env, check=True, capture_output=True, text=True).stdout
+    assert 'puki_invoke_pool_total{event="requests"} 7.0' in scrape
+    assert "puki_invoke_cache_entries" in scrape
@@ -0,0 +1,209 @@
+import json
+import threading
+import time
+import uuid
+
+import pytest
+import requests
+
+import invokes
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(body).encode() if body is not None else b""
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeUpstream:
+    """Stands in for Session.request: records calls and replays scripted responses."""
+
+    def __init__(self, *responses, on_call=None):
+        self.responses = list(responses)
+        self.calls = []
+        self.on_call = on_call
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, **kwargs):
+        with self.lock:
+            self.calls.append((method, url, kwargs))
+            response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if self.on_call:
+            self.on_call()
+        return response
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    def install(*responses, on_call=None):
+        fake = FakeUpstream(*responses, on_call=on_call)
+        monkeypatch.setattr(requests.Session, "request", lambda session, method, url, **kwargs: fake(method, url, **kwargs))
+        return fake
+    monkeypatch.setattr(invokes, "_backoff", lambda attempt: None)
+    invokes.clear_cache()
+    return install
+
+
+@pytest.fixture
+def url():
+    # A fresh host per test, so breakers and budgets don't leak between tests
+    return f"http://svc-{uuid.uuid4().hex[:8]}:5000/thing"
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = invokes.CircuitBreaker(threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one trial call at a time
+    assert not breaker.allow()
+
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.trips == 1
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = invokes.CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.trips == 2
+
+
+def test_open_breaker_rejects_without_calling_upstream(upstream, url):
+    fake = upstream(FakeResponse(503, {"code": 503, "message": "down"}))
+    for _ in range(invokes.BREAKER_THRESHOLD):
+        invokes.invoke_http(url, retries=0, coalesce=False)
+    assert len(fake.calls) == invokes.BREAKER_THRESHOLD
+
+    reply = invokes.invoke_http(url, retries=0, coalesce=False)
+    assert reply["code"] == 503
+    assert "Circuit open" in reply["message"]
+    assert len(fake.calls) == invokes.BREAKER_THRESHOLD
+
+
+def test_post_is_not_retried(upstream, url):
+    fake = upstream(FakeResponse(503, {"code": 503, "message": "busy"}))
+    reply = invokes.invoke_http(url, method="POST", json={"a": 1}, retries=3)
+    assert reply["code"] == 503
+    assert len(fake.calls) == 1
+
+
+def test_get_is_retried_on_503(upstream, url):
+    fake = upstream(FakeResponse(503, {"code": 503}), FakeResponse(200, {"code": 200, "data": 1}))
+    reply = invokes.invoke_http(url, retries=2, coalesce=False)
+    assert reply == {"code": 200, "data": 1}
+    assert len(fake.calls) == 2
+
+
+def test_retry_budget_exhaustion():
+    budget = invokes.RetryBudget(ratio=0, maximum=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    assert budget.exhausted == 1
+    budget.ratio = 0.5
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_exhausted_budget_stops_retries(upstream, url):
+    fake = upstream(FakeResponse(503, {"code": 503}))
+    _, budget = invokes._guards(invokes._target(url))
+    budget.ratio, budget.tokens = 0, 1
+
+    invokes.invoke_http(url, retries=5, coalesce=False)
+    # First attempt plus the single retry the budget could pay for
+    assert len(fake.calls) == 2
+    assert budget.exhausted == 1
+
+
+def test_concurrent_identical_gets_share_one_upstream_call(upstream, url):
+    callers = 8
+    release = threading.Event()
+
+    def wait_for_followers():
+        # Hold the leader's request open until every other caller has joined the flight
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with invokes._flights_lock:
+                flight = invokes._flights.get(url)
+                if flight is not None and flight.waiters == callers - 1:
+                    break
+            time.sleep(0.005)
+        release.set()
+
+    fake = upstream(FakeResponse(200, {"code": 200, "data": {"n": 1}}), on_call=wait_for_followers)
+    results = [None] * callers
+
+    def call(i):
+        results[i] = invokes.invoke_http(url, coalesce=True)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert release.is_set()
+    assert len(fake.calls) == 1
+    assert all(r == {"code": 200, "data": {"n": 1}} for r in results)
+    # Every caller gets its own copy
+    assert len({id(r) for r in results}) == callers
+
+
+def test_304_revalidation_renews_cache_entry(upstream, url):
+    fake = upstream(
+        FakeResponse(200, {"code": 200, "data": "v1"}, {"ETag": '"abc"'}),
+        FakeResponse(304, headers={"ETag": '"abc"'})
+    )
+    assert invokes.invoke_http(url, cache_ttl=0.05)["data"] == "v1"
+    assert invokes.invoke_http(url, cache_ttl=0.05)["data"] == "v1"
+    assert len(fake.calls) == 1
+
+    time.sleep(0.06)
+    before = invokes.cache_stats()["revalidated"]
+    assert invokes.invoke_http(url, cache_ttl=0.05)["data"] == "v1"
+    assert len(fake.calls) == 2
+    assert fake.calls[1][2]["headers"]["If-None-Match"] == '"abc"'
+    assert invokes.cache_stats()["revalidated"] == before + 1
+
+    # The 304 renewed the entry, so the next call is a fresh hit
+    assert invokes.invoke_http(url, cache_ttl=0.05)["data"] == "v1"
+    assert len(fake.calls) == 2
+
+
+def test_cache_evicts_least_recently_used(upstream, monkeypatch):
+    monkeypatch.setattr(invokes, "CACHE_SIZE", 2)
+    fake = upstream(FakeResponse(200, {"code": 200, "data": "x"}))
+    host = f"http://svc-{uuid.uuid4().hex[:8]}:5000"
+    a, b, c = f"{host}/a", f"{host}/b", f"{host}/c"
+
+    invokes.invoke_http(a, cache_ttl=60)
+    invokes.invoke_http(b, cache_ttl=60)
+    invokes.invoke_http(a, cache_ttl=60)  # a is now the most recently used
+    before = invokes.cache_stats()["evictions"]
+    invokes.invoke_http(c, cache_ttl=60)
+    assert invokes.cache_stats()["evictions"] == before + 1
+    assert len(fake.calls) == 3
+
+    invokes.invoke_http(a, cache_ttl=60)
+    assert len(fake.calls) == 3
+    invokes.invoke_http(b, cache_ttl=60)
+    assert len(fake.calls) == 4
@@ -0,0 +1,130 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import guest
+import listing
+import roster
+from guest import Guest
+from roster import Roster
+
+
+@pytest.fixture
+def guests():
+    with guest.app.app_context():
+        guest.db.create_all()
+        guest.db.session.add_all(
+            Guest(guest_id=i, name=f"Guest {i}", email=f"guest{i}@example.com", contact=f"9{i:07d}")
+            for i in range(1, 26)
+        )
+        guest.db.session.commit()
+        yield guest.app.test_client()
+        guest.db.session.remove()
+        guest.db.drop_all()
+
+
+@pytest.fixture
+def rosters():
+    with roster.app.app_context():
+        roster.db.create_all()
+        first = date(2025, 1, 30)
+        roster.db.session.add_all(
+            Roster(date=first + timedelta(days=d), room_id=room_id, floor=int(room_id[0]), housekeeper_id=d + 1)
+            for d in range(3) for room_id in ("101", "102", "201")
+        )
+        roster.db.session.commit()
+        yield roster.app.test_client()
+        roster.db.session.remove()
+        roster.db.drop_all()
+
+
+def walk(client, url, envelope):
+    rows, pages = [], 0
+    while url:
+        data = client.get(url).get_json()["data"]
+        rows += data[envelope]
+        pages += 1
+        base = url.split("&after=")[0]
+        url = f"{base}&after={data['next']}" if data["next"] else None
+    return rows, pages
+
+
+def test_cursor_pages_cover_every_row_once(guests):
+    response = guests.get("/guest?limit=10")
+    data = response.get_json()["data"]
+    assert [g["guest_id"] for g in data["guests"]] == list(range(1, 11))
+    assert data["next"] == "10"
+
+    data = guests.get("/guest?limit=10&after=10").get_json()["data"]
+    assert [g["guest_id"] for g in data["guests"]] == list(range(11, 21))
+
+    rows, pages = walk(guests, "/guest?limit=10", "guests")
+    assert [g["guest_id"] for g in rows] == list(range(1, 26))
+    assert pages == 3
+
+
+def test_last_full_page_has_no_next(guests):
+    data = guests.get("/guest?limit=5&after=20").get_json()["data"]
+    assert [g["guest_id"] for g in data["guests"]] == list(range(21, 26))
+    assert data["next"] is None
+
+
+def test_limit_is_clamped_and_validated(guests, monkeypatch):
+    monkeypatch.setattr(listing, "MAX_LIMIT", 7)
+    assert len(guests.get("/guest?limit=100").get_json()["data"]["guests"]) == 7
+    assert guests.get("/guest?limit=0").status_code == 400
+    assert guests.get("/guest?limit=ten").status_code == 400
+    assert guests.get("/guest?after=abc").status_code == 400
+    assert guests.get("/guest?format=csv").status_code == 400
+
+
+def test_composite_roster_cursor(rosters):
+    data = rosters.get("/roster?limit=4").get_json()["data"]
+    assert [(r["date"], r["room_id"]) for r in data["roster"]] == [
+        ("2025-01-30", "101"), ("2025-01-30", "102"), ("2025-01-30", "201"), ("2025-01-31", "101")
+    ]
+    assert data["next"] == "2025-01-31,101"
+
+    # The cursor resumes inside a date, not at the next one
+    data = rosters.get("/roster?limit=2&after=2025-01-31,101").get_json()["data"]
+    assert [(r["date"], r["room_id"]) for r in data["roster"]] == [("2025-01-31", "102"), ("2025-01-31", "201")]
+
+    rows, pages = walk(rosters, "/roster?limit=4", "roster")
+    assert len(rows) == 9 and len({(r["date"], r["room_id"]) for r in rows}) == 9
+    assert pages == 3
+
+    assert rosters.get("/roster?after=2025-01-31").status_code == 400
+    assert rosters.get("/roster?after=31/01/2025,101").status_code == 400
+
+
+def test_field_projection(rosters):
+    data = rosters.get("/roster?fields=room_id,floor&limit=2").get_json()["data"]
+    assert data["roster"] == [{"room_id": "101", "floor": 1}, {"room_id": "102", "floor": 1}]
+    # Key columns left out of the projection still drive the cursor
+    assert data["next"] == "2025-01-30,102"
+
+    response = rosters.get("/roster?fields=room_id,nickname")
+    assert response.status_code == 400
+    assert "nickname" in response.get_json()["message"]
+
+
+def test_roster_dates_match_on_legacy_and_projected_paths(rosters):
+    legacy = rosters.get("/roster").get_json()["data"]
+    projected = rosters.get("/roster?limit=100").get_json()["data"]["roster"]
+    by_date = rosters.get("/roster/2025-01-30").get_json()["data"]["roster"]
+    assert legacy == projected
+    assert {r["date"] for r in by_date} == {"2025-01-30"}
+
+
+def test_ndjson_streams_every_row_across_batches(guests, monkeypatch):
+    monkeypatch.setattr(listing, "STREAM_BATCH", 4)
+    response = guests.get("/guest?format=ndjson&fields=guest_id,email")
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["guest_id"] for line in lines] == list(range(1, 26))
+    assert lines[0] == {"guest_id": 1, "email": "guest1@example.com"}
+
+    response = guests.get("/guest?format=ndjson&after=5&limit=10")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["guest_id"] for line in lines] == list(range(6, 16))
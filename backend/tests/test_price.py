@@ -0,0 +1,106 @@
+from datetime import date
+
+import pytest
+
+import price
+from price import Price, PriceSummary, RatePeriod, apply_rates, db
+
+
+@pytest.fixture
+def client():
+    with price.app.app_context():
+        db.create_all()
+        for room_id, room_type, value in [("101", "Single", 100.0), ("102", "Single", 100.0), ("201", "Family", 200.0)]:
+            db.session.add(Price(room_id=room_id, floor=int(room_id[0]), room_type=room_type, price=value))
+        price.refresh_summary(["single", "family"])
+        db.session.commit()
+        yield price.app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def add_period(room_type, effective_from, value):
+    db.session.add(RatePeriod(room_type_key=room_type.lower(), effective_from=effective_from,
+                              room_type=room_type, price=value))
+    db.session.commit()
+
+
+def prices():
+    db.session.expire_all()
+    return {row.room_id: row.price for row in db.session.scalars(db.select(Price))}
+
+
+def apply_rates_on(day):
+    result = price.app.test_cli_runner().invoke(args=["apply-rates", "--date", str(day)])
+    assert result.exception is None, result.output
+    return result.output
+
+
+def test_apply_rates_sets_each_type_to_its_rate_in_force():
+    with price.app.app_context():
+        db.create_all()
+        try:
+            for room_id, room_type in [("101", "Single"), ("102", "Single"), ("201", "Family"), ("301", "Suite")]:
+                db.session.add(Price(room_id=room_id, floor=1, room_type=room_type, price=1.0))
+            add_period("Single", date(2025, 1, 1), 100.0)
+            add_period("Single", date(2025, 2, 1), 120.0)
+            add_period("Family", date(2025, 3, 1), 250.0)
+
+            apply_rates({"single", "family", "suite"}, date(2025, 2, 10))
+            db.session.commit()
+
+            # Family's only period starts later and Suite has none: both keep their prices
+            assert prices() == {"101": 120.0, "102": 120.0, "201": 1.0, "301": 1.0}
+            assert db.session.get(PriceSummary, "single").representative_price == 120.0
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def test_apply_rates_command_keeps_room_overrides(client):
+    assert client.put("/price/Single", json={"price": 150, "effective_from": "2025-01-01"}).status_code == 200
+    assert prices()["101"] == 150.0
+    assert client.put("/price/101", json={"price": 300}).status_code == 200
+
+    # The period in force is already applied: the override stays
+    assert "0 room types" in apply_rates_on(date(2025, 1, 5))
+    assert prices() == {"101": 300.0, "102": 150.0, "201": 200.0}
+
+    # A new period comes into force: the whole type is repriced once
+    add_period("Single", date(2025, 2, 1), 180.0)
+    assert "1 room types" in apply_rates_on(date(2025, 2, 1))
+    assert prices() == {"101": 180.0, "102": 180.0, "201": 200.0}
+
+    assert client.put("/price/101", json={"price": 300}).status_code == 200
+    assert "0 room types" in apply_rates_on(date(2025, 2, 2))
+    assert prices()["101"] == 300.0
+
+
+def test_apply_rates_command_catches_up_missed_periods(client):
+    add_period("Family", date(2025, 1, 1), 210.0)
+    add_period("Family", date(2025, 1, 3), 230.0)
+    apply_rates_on(date(2025, 1, 10))
+    assert prices()["201"] == 230.0
+
+
+def test_get_rates_over_a_range(client):
+    add_period("Single", date(2025, 1, 1), 110.0)
+    add_period("Single", date(2025, 1, 10), 120.0)
+    add_period("Single", date(2025, 1, 20), 130.0)
+
+    response = client.get("/price/type/single/rates?start=2025-01-05&end=2025-01-20")
+    periods = response.get_json()["data"]["periods"]
+    assert [(p["applies_from"], p["price"]) for p in periods] == [("2025-01-05", 110.0), ("2025-01-10", 120.0)]
+
+
+def test_get_rates_before_any_period_uses_room_prices(client):
+    add_period("Family", date(2025, 2, 1), 250.0)
+
+    response = client.get("/price/type/Family/rates?start=2025-01-01&end=2025-03-01")
+    periods = response.get_json()["data"]["periods"]
+    assert [(p["effective_from"], p["applies_from"], p["price"]) for p in periods] == [
+        (None, "2025-01-01", 200.0), ("2025-02-01", "2025-02-01", 250.0)
+    ]
+
+    assert client.get("/price/type/Suite/rates?start=2025-01-01&end=2025-03-01").status_code == 404
+    assert client.get("/price/type/Family/rates?start=2025-03-01&end=2025-01-01").status_code == 400
@@ -0,0 +1,140 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import promotion
+from promotion import Promotion, PromoWindow, PromotionIndex, db, promotion_rank
+
+
+def window(promo_id, start, end, discount=10.0, room_type="Single"):
+    return PromoWindow(start, end, discount, promo_id, {"promo_id": promo_id, "room_type": room_type})
+
+
+def winner(index, room_type, day):
+    promo = max(index.covering(room_type, day), key=promotion_rank, default=None)
+    return promo.promo_id if promo else None
+
+
+def test_covering_overlapping_windows():
+    index = PromotionIndex([
+        window(1, date(2025, 1, 1), date(2025, 1, 10)),
+        window(2, date(2025, 1, 5), date(2025, 1, 15)),
+        window(3, date(2025, 1, 20), date(2025, 1, 25)),
+    ], date(2025, 1, 1))
+    assert {w.promo_id for w in index.covering("Single", date(2025, 1, 7))} == {1, 2}
+    assert {w.promo_id for w in index.covering("Single", date(2025, 1, 12))} == {2}
+    assert list(index.covering("Single", date(2025, 1, 17))) == []
+    assert list(index.covering("Family", date(2025, 1, 7))) == []
+
+
+def test_covering_long_early_window_reaches_later_dates():
+    # Shorter windows starting later must not hide the long one behind them
+    index = PromotionIndex([
+        window(1, date(2025, 1, 1), date(2025, 12, 31)),
+        window(2, date(2025, 3, 1), date(2025, 3, 5)),
+        window(3, date(2025, 6, 1), date(2025, 6, 3)),
+    ], date(2025, 1, 1))
+    assert [w.promo_id for w in index.covering("Single", date(2025, 7, 1))] == [1]
+    assert {w.promo_id for w in index.covering("single", date(2025, 6, 2))} == {1, 3}
+
+
+def test_best_discount_wins_then_later_start_then_lowest_id():
+    index = PromotionIndex([
+        window(1, date(2025, 1, 1), date(2025, 1, 31), discount=10.0),
+        window(2, date(2025, 1, 5), date(2025, 1, 31), discount=20.0),
+        window(3, date(2025, 1, 3), date(2025, 1, 31), discount=20.0),
+        window(5, date(2025, 1, 10), date(2025, 1, 31), discount=30.0),
+        window(4, date(2025, 1, 10), date(2025, 1, 31), discount=30.0),
+    ], date(2025, 1, 1))
+    assert winner(index, "Single", date(2025, 1, 4)) == 3
+    assert winner(index, "Single", date(2025, 1, 6)) == 2   # equal discount: later start
+    assert winner(index, "Single", date(2025, 1, 12)) == 4  # equal start too: lowest id
+
+
+def test_covering_matches_brute_force():
+    rng = random.Random(7)
+    first = date(2025, 1, 1)
+    windows = []
+    for promo_id in range(1, 300):
+        start = first + timedelta(days=rng.randrange(200))
+        windows.append(window(promo_id, start, start + timedelta(days=rng.choice([0, 1, 3, 10, 60, 150])),
+                              discount=float(rng.randint(1, 5)), room_type=rng.choice(["Single", "Family"])))
+    index = PromotionIndex(windows, first)
+    for offset in range(0, 400):
+        day = first + timedelta(days=offset)
+        for room_type in ("Single", "Family"):
+            expected = {w.promo_id for w in windows
+                        if w.data["room_type"] == room_type and w.promo_start <= day <= w.promo_end}
+            assert {w.promo_id for w in index.covering(room_type, day)} == expected
+
+
+@pytest.fixture
+def client():
+    with promotion.app.app_context():
+        db.create_all()
+        promotion._index = None
+        yield promotion.app.test_client()
+        db.session.remove()
+        db.drop_all()
+        promotion._index = None
+
+
+def add_promotion(code, start, end, discount, room_type="Single"):
+    promo = Promotion(promo_name=code, promo_code=code, promo_start=start, promo_end=end,
+                      promo_discount=discount, room_type=room_type)
+    db.session.add(promo)
+    db.session.commit()
+    promotion._index = None
+    return promo.promo_id
+
+
+def test_quote_past_dates_fall_back_to_database(client):
+    today = datetime.utcnow().date()
+    past = add_promotion("PAST", today - timedelta(days=30), today - timedelta(days=20), 15.0)
+    current = add_promotion("NOW", today - timedelta(days=1), today + timedelta(days=5), 25.0)
+
+    response = client.post("/promotion/quote", json={"pairs": [
+        {"room_type": "Single", "date": str(today - timedelta(days=25))},
+        {"room_type": "Single", "date": str(today + timedelta(days=2))},
+        {"room_type": "Single", "date": str(today - timedelta(days=10))},
+    ]})
+    assert response.status_code == 200
+    quotes = response.get_json()["data"]["quotes"]
+    assert [q["promotion"]["promo_id"] if q["promotion"] else None for q in quotes] == [past, current, None]
+
+    assert promotion.applicable_promotion("Single", today - timedelta(days=25)).promo_id == past
+
+
+def test_quote_expands_ranges_in_order(client):
+    today = datetime.utcnow().date()
+    add_promotion("NOW", today, today + timedelta(days=1), 10.0)
+    response = client.post("/promotion/quote", json={
+        "pairs": [{"room_type": "Family", "date": str(today)}],
+        "ranges": [{"room_type": "Single", "start": str(today), "end": str(today + timedelta(days=2))}]
+    })
+    quotes = response.get_json()["data"]["quotes"]
+    assert [(q["room_type"], q["date"], q["promotion"] is not None) for q in quotes] == [
+        ("Family", str(today), False),
+        ("Single", str(today), True),
+        ("Single", str(today + timedelta(days=1)), True),
+        ("Single", str(today + timedelta(days=2)), False),
+    ]
+
+
+def test_quote_pair_limits(client, monkeypatch):
+    monkeypatch.setattr(promotion, "MAX_QUOTE_PAIRS", 5)
+    day = date(2030, 1, 1)
+
+    def quote(body):
+        return client.post("/promotion/quote", json=body).status_code
+
+    assert quote({"ranges": [{"room_type": "Single", "start": "2030-01-01", "end": "2030-01-05"}]}) == 200
+    assert quote({"ranges": [{"room_type": "Single", "start": "2030-01-01", "end": "2030-01-06"}]}) == 400
+    assert quote({"pairs": [{"room_type": "Single", "date": str(day)}] * 6}) == 400
+    assert quote({"pairs": [{"room_type": "Single", "date": str(day)}] * 3,
+                  "ranges": [{"room_type": "Single", "start": "2030-01-01", "end": "2030-01-03"}]}) == 400
+    assert quote({"ranges": [{"room_type": "Single", "start": "2030-01-05", "end": "2030-01-01"}]}) == 400
+    assert quote({"pairs": [{"room_type": "Single"}]}) == 400
+    assert quote({"pairs": [{"room_type": "Single", "date": "01/01/2030"}]}) == 400
+    assert quote({}) == 400
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import room
+from room import Room, db
+
+
+@pytest.fixture
+def client():
+    with room.app.app_context():
+        db.create_all()
+        yield room.app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def add_rooms(*rooms):
+    for room_id, room_type, floor, availability in rooms:
+        db.session.add(Room(room_id=room_id, room_type=room_type, key_pin=0, floor=floor, availability=availability))
+    db.session.commit()
+
+
+def test_claim_prefers_floor(client):
+    add_rooms(("101", "Single", 1, "VACANT"), ("201", "Single", 2, "VACANT"), ("202", "Single", 2, "VACANT"))
+    response = client.post("/room/claim", json={"room_type": "Single", "floor": 2})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["room_id"] == "201"
+
+
+def test_claim_falls_back_to_any_floor(client):
+    add_rooms(("101", "Single", 1, "OCCUPIED"), ("202", "Single", 2, "VACANT"), ("301", "Family", 3, "VACANT"))
+    response = client.post("/room/claim", json={"room_type": "Single", "floor": 1})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["room_id"] == "202"
+
+    response = client.post("/room/claim", json={"room_type": "Single"})
+    assert response.status_code == 404
+
+
+# SKIP LOCKED only means something on MySQL: run with DATABASE_URL pointing at a
+# scratch MySQL database (the tables are dropped afterwards).
+@pytest.mark.skipif(not str(room.app.config["SQLALCHEMY_DATABASE_URI"]).startswith("mysql"),
+                    reason="needs DATABASE_URL for a MySQL database")
+def test_concurrent_claims_each_get_a_room(client):
+    claimers = 50
+    add_rooms(*[(f"{i:03d}", "Single", i % 5 + 1, "VACANT") for i in range(claimers)])
+
+    barrier = threading.Barrier(claimers)
+    results = [None] * claimers
+
+    def claim(index):
+        test_client = room.app.test_client()
+        barrier.wait()
+        response = test_client.post("/room/claim", json={"room_type": "Single", "floor": 1})
+        results[index] = (response.status_code, response.get_json().get("data", {}).get("room_id"))
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(claimers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [code for code, _ in results] == [200] * claimers
+    assert len({room_id for _, room_id in results}) == claimers
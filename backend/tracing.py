@@ -0,0 +1,116 @@
+"""
+Lightweight request tracing for Puki services.
+
+A trace id arrives in the X-Trace-Id header (or is generated at the edge), is
+kept in a context variable for the duration of the request and is forwarded
+by invokes on every outbound call. Each outbound call is recorded as a span
+(start offset, duration, status). When the caller sends X-Trace-Debug: 1 (or
+the service runs with TRACE_SPANS=true), composite services summarise their
+span tree in the X-Trace-Spans response header, and the debug flag travels
+downstream with the trace id so nested summaries are filled in too.
+"""
+
+import contextvars
+import json
+import time
+import uuid
+
+TRACE_HEADER = "X-Trace-Id"
+PARENT_HEADER = "X-Parent-Span-Id"
+SPANS_HEADER = "X-Trace-Spans"
+DEBUG_HEADER = "X-Trace-Debug"
+
+# Keep the debug header well under common proxy header limits
+MAX_SUMMARY_LENGTH = 4000
+
+_current = contextvars.ContextVar("puki_trace", default=None)
+
+
+class Trace:
+    def __init__(self, trace_id=None, parent_span_id=None, debug=False):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.debug = debug
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def elapsed_ms(self, since=None):
+        return (time.perf_counter() - (self.started if since is None else since)) * 1000
+
+
+def begin(trace_id=None, parent_span_id=None, debug=False):
+    """Start (or continue) a trace for the current request; returns a token for end().
+       debug: the caller asked for the span summary (X-Trace-Debug)
+    """
+    return _current.set(Trace(trace_id, parent_span_id, debug))
+
+
+def debug_requested(value):
+    """True if an X-Trace-Debug header value asks for the span summary."""
+    return (value or "").strip().lower() in ("1", "true", "yes")
+
+
+def end(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def outgoing_headers():
+    """Headers that carry the current trace to a downstream service."""
+    trace = _current.get()
+    if trace is None:
+        return {}
+    headers = {TRACE_HEADER: trace.trace_id, PARENT_HEADER: trace.span_id}
+    if trace.debug:
+        headers[DEBUG_HEADER] = "1"
+    return headers
+
+
+def record_span(target, method, path, started, status, child_summary=None):
+    """Record one outbound hop that began at perf_counter() value `started`."""
+    trace = _current.get()
+    if trace is None:
+        return
+    trace.spans.append({
+        "target": target,
+        "method": method,
+        "path": path,
+        "start_ms": round((started - trace.started) * 1000, 1),
+        "duration_ms": round(trace.elapsed_ms(started), 1),
+        "status": status,
+        "children": child_summary
+    })
+
+
+def summary(service, trace=None):
+    """One-line span tree, e.g. 'checkin 84.0ms [booking GET /booking/1 200 @0.4ms 9.1ms; ...]'."""
+    trace = trace or _current.get()
+    if trace is None:
+        return ""
+    parts = []
+    for span in sorted(trace.spans, key=lambda s: s["start_ms"]):
+        part = f'{span["target"]} {span["method"]} {span["path"]} {span["status"]} @{span["start_ms"]}ms {span["duration_ms"]}ms'
+        if span["children"]:
+            part += " {" + span["children"] + "}"
+        parts.append(part)
+    text = f"{service} {round(trace.elapsed_ms(), 1)}ms [" + "; ".join(parts) + "]"
+    if len(text) > MAX_SUMMARY_LENGTH:
+        text = text[:MAX_SUMMARY_LENGTH - 3] + "..."
+    return text
+
+
+def log(service, **fields):
+    """Print one structured log line tagged with the current trace id."""
+    trace = _current.get()
+    entry = {"service": service}
+    if trace is not None:
+        entry["trace_id"] = trace.trace_id
+        entry["span_id"] = trace.span_id
+        if trace.parent_span_id:
+            entry["parent_span_id"] = trace.parent_span_id
+    entry.update(fields)
+    print(json.dumps(entry, default=str), flush=True)